@@ -0,0 +1,97 @@
+import asyncio
+import threading
+from collections import Counter
+
+
+class MicroBatcher:
+    """Coalesces concurrent submissions into batched calls of fn.
+
+    fn takes a list of items and returns a list of results in the same order.
+    A batch is flushed after max_wait_ms or once max_batch_size items are
+    waiting, whichever comes first. run executes fn (e.g. an executor's run
+    coroutine); several batches may be in flight at once.
+    """
+
+    def __init__(self, fn, max_batch_size=32, max_wait_ms=5.0, run=None):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._run = run or self._run_inline
+        self._loop = None
+        self._queue = None
+        self._worker = None
+        # The loop keeps only weak references to tasks; hold in-flight
+        # batches here so none is garbage-collected before it resolves.
+        self._tasks = set()
+        self._lock = threading.Lock()
+        self.batch_sizes = Counter()
+
+    @staticmethod
+    async def _run_inline(fn, items):
+        return fn(items)
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._collect())
+
+    async def submit(self, item):
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _collect(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = self._loop.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch):
+        with self._lock:
+            self.batch_sizes[len(batch)] += 1
+        items = [item for item, _ in batch]
+        try:
+            results = await self._run(self.fn, items)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        with self._lock:
+            batches = sum(self.batch_sizes.values())
+            items = sum(size * count for size, count in self.batch_sizes.items())
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "batches": batches,
+                "items": items,
+                "mean_batch_size": items / batches if batches else 0.0,
+                "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+            }
+
+    async def close(self):
+        """Stop collecting, let in-flight batches finish and cancel queued items."""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            future.cancel()
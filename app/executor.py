@@ -0,0 +1,67 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+from threadpoolctl import threadpool_limits
+
+
+class Saturated(Exception):
+    pass
+
+
+class BoundedExecutor:
+    """Thread pool with a bounded backlog: at most max_workers + max_queue jobs.
+
+    Torch and NumPy release the GIL in their kernels, so threads give real
+    parallelism here while sharing one copy of the model and artifacts.
+    """
+
+    def __init__(self, max_workers=4, max_queue=64, compute_threads=1):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.compute_threads = compute_threads
+        # Intra-op pools are process-wide; pinning them keeps concurrent
+        # requests from oversubscribing the cores.
+        if compute_threads:
+            torch.set_num_threads(compute_threads)
+            threadpool_limits(limits=compute_threads)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="recommender"
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    async def run(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise Saturated(f"{self.max_workers + self.max_queue} jobs already queued")
+
+        with self._lock:
+            self.in_flight += 1
+        future = self._executor.submit(fn, *args, **kwargs)
+        # Release on completion, not on await, so cancelled requests keep
+        # holding their slot until the worker actually finishes.
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, _future):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "compute_threads": self.compute_threads,
+                "in_flight": self.in_flight,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
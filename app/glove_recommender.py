@@ -1,84 +1,160 @@
+import copy
+import itertools
+
 import numpy as np
 import pandas as pd
 import torch
-from sklearn.metrics.pairwise import linear_kernel
 
-from utils.autoencoder import Autoencoder
-from utils.glove import Glove
-from utils.tokenizer import MyTokenizer
-from utils.train_embedding import create_embedding_matrix, mean_pooling, get_enhanced_embeddings
+from app.cache import LRUCache, normalize_query
+from utils import ranking
+from utils.artifacts import ArtifactBundle
+from utils.index import BruteForceIndex
+from utils.pooling import ragged_mean_pool
+
+# Shared by every load and derivation, so a version id is never reused: the
+# manifest's created_at alone does not tell apart two loads of one bundle
+# with other data, or two bundles saved in the same second.
+_version_ids = itertools.count(1)
 
 
 class GloVeRecommender:
     def __init__(
-        self, df: pd.DataFrame, model, embeddings, threshold=0.1
+        self,
+        df: pd.DataFrame,
+        model,
+        embeddings,
+        tokenizer,
+        embedding_matrix,
+        threshold=0.1,
+        index=None,
+        version=None,
+        query_cache_size=1024,
     ):
         self.df = df
         self.model = model
+        # Either a full Autoencoder or an exported encoder-only module.
+        self.encoder = getattr(model, "encoder", model)
         self.embeddings = embeddings
+        self.tokenizer = tokenizer
+        self.embedding_matrix = embedding_matrix
         self.threshold = threshold
-
-        glove = Glove._load_glove_vectors("model/glove.6B/glove.6B.300d.txt")
-        self.tokenizer = MyTokenizer(sentence_length=450, case_sensitive=False)
-        self.tokenizer.fit(df.whole_text)
-
-        self.embedding_matrix = create_embedding_matrix(self.tokenizer.vocab, glove)
+        self.index = index or BruteForceIndex(embeddings)
+        self.version = version
+        self.base_version = version
+        self.query_vector_cache = LRUCache(maxsize=query_cache_size)
+        # Documents ingested since the last compaction, and deleted rows.
+        self.delta_embeddings = np.empty((0, embeddings.shape[1]), dtype=np.float32)
+        self.deleted = np.empty(0, dtype=np.int64)
 
     @classmethod
     def from_files(
-        cls, data_path: str, model_path: str, embedding_path: str, threshold=0.1
+        cls, data_path: str, artifact_path: str, threshold=0.1, query_cache_size=1024
     ):
         df = pd.read_csv(data_path)
-        with open(model_path, "rb") as file:
-            model = Autoencoder(300,200,100)
-            model.load_state_dict(torch.load('model/example/autoencoder_model.pth'))
-        with open(embedding_path, "rb") as file:
-            embeddings = np.load(file)
+        bundle = ArtifactBundle.load(artifact_path, serving=True)
+        return cls(
+            df,
+            bundle.encoder,
+            bundle.embeddings,
+            bundle.tokenizer,
+            bundle.embedding_matrix,
+            threshold,
+            bundle.index,
+            f"{bundle.version}#{next(_version_ids)}",
+            query_cache_size,
+        )
 
+    def _encode_queries(self, queries):
+        flat_ids, lengths = self.tokenizer.encode_ragged(queries)
+        pooled_embeddings = ragged_mean_pool(flat_ids, lengths, self.embedding_matrix)
+        with torch.no_grad():
+            return self.encoder(torch.from_numpy(pooled_embeddings)).numpy()
 
+    def _get_query_vectors(self, queries):
+        if self.tokenizer.case_sensitive:
+            keys = [" ".join(query.split()) for query in queries]
+        else:
+            keys = [normalize_query(query) for query in queries]
+        vectors = [self.query_vector_cache.get(key) for key in keys]
 
-        return cls(df, model, embeddings, threshold)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            encoded = self._encode_queries([queries[i] for i in missing])
+            for i, vector in zip(missing, encoded):
+                self.query_vector_cache.put(keys[i], vector)
+                vectors[i] = vector
+        return np.stack(vectors)
 
     def _get_query_vector(self, query):
-        self.model.eval() 
-        tokens = self.tokenizer(query)  
-        vectors = [self.embedding_matrix[token] for token in tokens]  
-        pooled_embedding = mean_pooling(vectors) 
-        with torch.no_grad():
-            sentence_embedding = torch.FloatTensor(pooled_embedding).unsqueeze(0)
-            sentence_embedding = self.model.encoder(torch.FloatTensor(sentence_embedding).unsqueeze(0)).squeeze(0).detach().numpy()
-        return sentence_embedding
-    
+        return self._get_query_vectors([query])
+
+    def _derive(self, **changes):
+        # Updates return a new recommender sharing everything unchanged, so
+        # requests already holding this one never see a half-applied update.
+        derived = copy.copy(self)
+        derived.__dict__.update(changes)
+        derived.version = f"{self.base_version}+{next(_version_ids)}"
+        return derived
+
+    def with_documents(self, df):
+        """Append rows of df, encoded with the frozen encoder like queries are."""
+        if df.empty:
+            return self
+        embeddings = self._encode_queries(df["whole_text"].tolist())
+        return self._derive(
+            df=pd.concat([self.df, df], ignore_index=True),
+            delta_embeddings=np.concatenate((self.delta_embeddings, embeddings)),
+        )
+
+    def without_documents(self, titles):
+        positions = np.flatnonzero(self.df["drink_title"].isin(titles))
+        return self._derive(deleted=np.union1d(self.deleted, positions))
+
+    def needs_compaction(self, max_delta_fraction=0.1):
+        pending = len(self.delta_embeddings) + len(self.deleted)
+        return pending > max_delta_fraction * len(self.embeddings)
+
+    def compacted(self):
+        """Fold appended and deleted documents into a freshly built index."""
+        alive = np.setdiff1d(np.arange(len(self.df)), self.deleted)
+        embeddings = np.concatenate(
+            (np.asarray(self.embeddings, dtype=np.float32), self.delta_embeddings)
+        )[alive]
+        return self._derive(
+            df=self.df.iloc[alive].reset_index(drop=True),
+            embeddings=embeddings,
+            index=type(self.index)(**self.index.params()).build(embeddings),
+            delta_embeddings=self.delta_embeddings[:0],
+            deleted=self.deleted[:0],
+        )
+
+    def _search(self, query_vecs, top_n, threshold=None):
+        if not len(self.delta_embeddings) and not len(self.deleted):
+            return self.index.search(query_vecs, top_n, threshold)
+
+        # Over-fetch so deleted documents can be dropped without a shortfall.
+        n = top_n + len(self.deleted)
+        offset = len(self.embeddings)
+        delta = BruteForceIndex(self.delta_embeddings).search(query_vecs, n, threshold)
+        return [
+            ranking.merge_top_n(
+                [main, (indices + offset, scores)], top_n, excluded=self.deleted
+            )
+            for main, (indices, scores) in zip(
+                self.index.search(query_vecs, n, threshold), delta
+            )
+        ]
+
     def recommend(self, query, top_n=10):
-        query_vec = self._get_query_vector(query)
-        relevance_scores = linear_kernel(query_vec, self.embeddings)[0]
-        
-        top_indices = [
-            i
-            for i in relevance_scores.argsort()[::-1]
-            if relevance_scores[i] > self.threshold
-        ][:top_n]
-
-        if not top_indices:
+        return self.recommend_batch([query], top_n)[0]
+
+    def recommend_batch(self, queries, top_n=10):
+        if not queries:
             return []
+        query_vecs = self._get_query_vectors(queries)
+        results = self._search(query_vecs, top_n, self.threshold)
+        return [ranking.to_records(self.df, *result) for result in results]
 
-        return (
-            self.df[
-                [
-                    "drink_title",
-                    "drink_glass",
-                    "garnish",
-                    "comment",
-                    "history",
-                    "how_to_translated",
-                ]
-            ]
-            .iloc[top_indices]
-            .fillna("")
-            .to_dict(orient="records")
-        )
-    
-    def get_relevance_scores(self, query):
+    def get_relevance_scores(self, query, top_n=10):
         query_vec = self._get_query_vector(query)
-        relevance_scores = linear_kernel(query_vec, self.embeddings)[0]
-        return relevance_scores[relevance_scores.argsort()[::-1][:10]]
\ No newline at end of file
+        return self._search(query_vec, top_n)[0][1]
@@ -1,8 +1,19 @@
+import asyncio
 import os
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import List, Optional
 
+import pandas as pd
 import uvicorn
+from app.batcher import MicroBatcher
+from app.cache import LRUCache, normalize_query
+from app.executor import BoundedExecutor, Saturated
 from app.glove_recommender import GloVeRecommender
+from app.registry import ModelRegistry
 from fastapi import FastAPI, HTTPException, Query
+from pydantic import BaseModel
 
 
 class DummyModel:
@@ -15,17 +26,160 @@ def load_model():
     return predictor
 
 
-app = FastAPI()
+DATA_PATH = os.environ.get("RECSYS_DATA_PATH", "data/example/cocktail_data_gold.csv")
+ARTIFACT_PATH = os.environ.get("RECSYS_ARTIFACT_PATH", "model/example")
+# POST /models/load only reads artifacts and data from under these roots.
+MODELS_ROOT = Path(os.environ.get("RECSYS_MODELS_ROOT", "model")).resolve()
+DATA_ROOT = Path(os.environ.get("RECSYS_DATA_ROOT", "data")).resolve()
+
+
+def load_recommender(artifact_path=ARTIFACT_PATH, data_path=DATA_PATH):
+    return GloVeRecommender.from_files(
+        data_path=data_path,
+        artifact_path=artifact_path,
+        threshold=0.15,
+        query_cache_size=int(os.environ.get("RECSYS_EMBEDDING_CACHE_SIZE", 4096)),
+    )
+
+
+registry = ModelRegistry(
+    load_recommender, shadow_rate=float(os.environ.get("RECSYS_SHADOW_RATE", 1.0))
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Off the event loop, but before the first request is accepted.
+    await asyncio.to_thread(registry.load)
+    yield
+    await batcher.close()
+    executor.shutdown()
+    registry.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 app.predictor = load_model()
 
-glove = GloVeRecommender.from_files(
-    data_path="data/example/cocktail_data_gold.csv",
-    model_path="model/example/autoencoder_model.pth",
-    embedding_path="model/example/glove_trained_embeddings.npy",
-    threshold=0.15,
+executor = BoundedExecutor(
+    max_workers=int(os.environ.get("RECSYS_WORKERS", 4)),
+    max_queue=int(os.environ.get("RECSYS_QUEUE_SIZE", 64)),
+    compute_threads=int(os.environ.get("RECSYS_COMPUTE_THREADS", 1)),
+)
+
+result_cache_ttl = os.environ.get("RECSYS_RESULT_CACHE_TTL")
+result_cache = LRUCache(
+    maxsize=int(os.environ.get("RECSYS_RESULT_CACHE_SIZE", 4096)),
+    ttl=float(result_cache_ttl) if result_cache_ttl else None,
 )
 
 
+class BatchQuery(BaseModel):
+    queries: List[str]
+    top_n: int = 10
+
+
+class Document(BaseModel):
+    drink_title: str
+    whole_text: str
+    drink_glass: str = ""
+    garnish: str = ""
+    comment: str = ""
+    history: str = ""
+    how_to_translated: str = ""
+
+
+class Documents(BaseModel):
+    documents: List[Document]
+
+
+class DocumentTitles(BaseModel):
+    titles: List[str]
+
+
+class ModelVersion(BaseModel):
+    # Relative to RECSYS_MODELS_ROOT and RECSYS_DATA_ROOT.
+    artifact_path: str
+    data_path: Optional[str] = None
+    activate: bool = False
+
+
+compaction_fraction = float(os.environ.get("RECSYS_COMPACTION_FRACTION", 0.1))
+ingest_lock = asyncio.Lock()
+
+
+def resolve_under(root, path):
+    resolved = (root / path).resolve()
+    if not resolved.is_relative_to(root):
+        raise HTTPException(status_code=400, detail=f"{path} is outside {root.name}/")
+    return str(resolved)
+
+
+def format_result(rec, relevance):
+    return {
+        "title": rec["drink_title"],
+        "Drink Glass": rec["drink_glass"],
+        "Garnish": rec["garnish"],
+        "Comment": rec["comment"],
+        "History": rec["history"],
+        "How To": rec["how_to_translated"],
+        "relevance": round(relevance, 2),
+    }
+
+
+def recommend_batch(queries, top_n=10):
+    """Results from the active version, and that version's id."""
+    recommender = registry.active
+    started = time.perf_counter()
+    results = recommender.recommend_batch(queries, top_n=top_n)
+    registry.shadow(queries, top_n, results, time.perf_counter() - started)
+    formatted = [
+        [format_result(rec, rec["relevance"]) for rec in recs] for recs in results
+    ]
+    return formatted, recommender.version
+
+
+async def run_bounded(fn, *args):
+    try:
+        return await executor.run(fn, *args)
+    except Saturated:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is at capacity, retry later",
+            headers={"Retry-After": "1"},
+        )
+
+
+def recommend_coalesced(requests):
+    # One encoder pass and one scoring matmul for every request in the batch.
+    queries = [query for query, _ in requests]
+    top_n = max(top_n for _, top_n in requests)
+    results, version = recommend_batch(queries, top_n)
+    return [(recs[:n], version) for recs, (_, n) in zip(results, requests)]
+
+
+batcher = MicroBatcher(
+    recommend_coalesced,
+    max_batch_size=int(os.environ.get("RECSYS_MAX_BATCH_SIZE", 32)),
+    max_wait_ms=float(os.environ.get("RECSYS_MAX_BATCH_WAIT_MS", 5)),
+    run=run_bounded,
+)
+
+
+async def cached_recommend(query, top_n=10):
+    # The artifact version is part of the key, so entries from a previously
+    # loaded bundle can never be served after the artifacts change.
+    recommender = registry.active
+    key = (recommender.version, normalize_query(query), top_n, recommender.threshold)
+    results = result_cache.get(key)
+    if results is not None:
+        return results, recommender.version
+
+    # The batch may run on a newer version; cache under the one that served it.
+    results, version = await batcher.submit((query, top_n))
+    result_cache.put((version, *key[1:]), results)
+    return results, version
+
+
 @app.get("/predict")
 def predict(X: str = Query(..., description="Input text for prediction")):
     result = app.predictor.predict(X)
@@ -37,28 +191,131 @@ def predict(X: str = Query(..., description="Input text for prediction")):
 
 
 @app.get("/query")
-def query_route(query: str = Query(..., description="Search query")):
+async def query_route(query: str = Query(..., description="Search query")):
     if not query.strip():
         raise HTTPException(status_code=400, detail="No query provided")
 
-    recommendations = glove.recommend(query)
-    relevance_scores = list(glove.get_relevance_scores(query))  
-    print(relevance_scores)
-    relevance_scores = [int(i) for i in relevance_scores]
-    results = [
-        {
-            "title": rec["drink_title"],
-            "Drink Glass": rec["drink_glass"],
-            "Garnish": rec["garnish"],
-            "Comment": rec["comment"],
-            "History": rec["history"],
-            "How To": rec["how_to_translated"],
-            "relevance": round(relevance, 2),
-        }
-        for rec, relevance in zip(recommendations, relevance_scores)
-    ]
+    results, version = await cached_recommend(query)
+    return {"results": results, "version": version, "message": "OK"}
+
+
+@app.post("/query/batch")
+async def batch_query_route(batch: BatchQuery):
+    if not batch.queries or any(not query.strip() for query in batch.queries):
+        raise HTTPException(status_code=400, detail="Empty query in batch")
+
+    results, version = await run_bounded(recommend_batch, batch.queries, batch.top_n)
+    return {"results": results, "version": version, "message": "OK"}
+
+
+async def swap_active(update):
+    """Apply update to a copy of the recommender off the event loop, then swap it in.
+
+    Requests that already hold the old recommender finish on it; new ones see
+    the updated one. The lock serializes writers so no update is lost.
+    """
+    async with ingest_lock:
+        current = registry.active
+        updated = await run_bounded(update, current)
+        if updated.needs_compaction(compaction_fraction):
+            updated = await run_bounded(updated.compacted)
+        if not registry.replace(current, updated):
+            raise HTTPException(
+                status_code=409, detail="A new model version was activated, retry"
+            )
+    return document_stats()
+
+
+def document_stats():
+    current = registry.active
+    return {
+        "version": current.version,
+        "documents": len(current.df) - len(current.deleted),
+        "pending_appends": len(current.delta_embeddings),
+        "pending_deletes": len(current.deleted),
+    }
+
+
+@app.post("/documents")
+async def add_documents_route(batch: Documents):
+    if not batch.documents:
+        raise HTTPException(status_code=400, detail="No documents provided")
+
+    df = pd.DataFrame([document.model_dump() for document in batch.documents])
+    return {
+        **await swap_active(lambda current: current.with_documents(df)),
+        "message": "OK",
+    }
+
+
+@app.post("/documents/delete")
+async def delete_documents_route(batch: DocumentTitles):
+    return {
+        **await swap_active(lambda current: current.without_documents(batch.titles)),
+        "message": "OK",
+    }
+
+
+@app.post("/documents/compact")
+async def compact_documents_route():
+    return {
+        **await swap_active(lambda current: current.compacted()),
+        "message": "OK",
+    }
+
+
+@app.get("/cache/stats")
+def cache_stats_route():
+    return {
+        "results": result_cache.stats(),
+        "query_vectors": registry.active.query_vector_cache.stats(),
+        "version": registry.active.version,
+    }
+
+
+@app.get("/models")
+def models_route():
+    return registry.stats()
+
+
+@app.post("/models/load", status_code=202)
+def load_model_route(version: ModelVersion):
+    artifact_path = resolve_under(MODELS_ROOT, version.artifact_path)
+    data_path = (
+        DATA_PATH
+        if version.data_path is None
+        else resolve_under(DATA_ROOT, version.data_path)
+    )
+    if not registry.load_in_background(
+        artifact_path, data_path, activate=version.activate
+    ):
+        raise HTTPException(status_code=409, detail="A model version is loading")
+    return {**registry.stats(), "message": "Loading"}
+
+
+@app.post("/models/promote")
+def promote_model_route():
+    try:
+        registry.promote()
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {**registry.stats(), "message": "OK"}
+
+
+@app.post("/models/discard")
+def discard_model_route():
+    registry.discard()
+    return {**registry.stats(), "message": "OK"}
+
+
+@app.get("/executor/stats")
+def executor_stats_route():
+    return executor.stats()
+
 
-    return {"results": results, "message": "OK"}
+@app.get("/batcher/stats")
+def batcher_stats_route():
+    return batcher.stats()
 
 
 def run():
@@ -0,0 +1,187 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WARMUP_QUERIES = [
+    "gin with lime",
+    "a dark drink for the halloween",
+    "smoky whiskey with bitters",
+    "sweet and fruity rum punch",
+]
+
+
+class ModelRegistry:
+    """The active recommender, plus an optional candidate scored in shadow.
+
+    loader(*args, **kwargs) builds a recommender. New versions are loaded and
+    warmed up before they are published, and publishing is a single
+    reference swap: a request that already holds a recommender finishes on
+    it. While a candidate is loaded, live batches are replayed against it on
+    a separate thread to compare latency and result overlap with the active
+    version; shadow work is dropped rather than queued when that thread is busy.
+    """
+
+    def __init__(
+        self, loader, warmup_queries=WARMUP_QUERIES, shadow_rate=1.0, max_samples=1000
+    ):
+        self.loader = loader
+        self.warmup_queries = warmup_queries
+        self.shadow_rate = shadow_rate
+        self.active = None
+        self.candidate = None
+        self.loading = None
+        self.last_error = None
+        self.shadow_dropped = 0
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=max_samples)
+        self._random = random.Random(0)
+        self._shadow_slot = threading.BoundedSemaphore(1)
+        self._shadow_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="shadow"
+        )
+
+    def load(self, *args, activate=True, **kwargs):
+        started = time.perf_counter()
+        recommender = self.loader(*args, **kwargs)
+        self.warmup(recommender)
+        with self._lock:
+            if activate:
+                self.active = recommender
+            else:
+                self.candidate = recommender
+                self._samples.clear()
+        logger.info(
+            f"Loaded {'active' if activate else 'candidate'} version "
+            f"{recommender.version} in {time.perf_counter() - started:.2f}s"
+        )
+        return recommender
+
+    def load_in_background(self, *args, activate=False, **kwargs):
+        """Start load in a thread; False if another load is still running."""
+        with self._lock:
+            if self.loading is not None:
+                return False
+            self.loading = {"args": [str(arg) for arg in args], "activate": activate}
+            self.last_error = None
+        threading.Thread(
+            target=self._load_and_report,
+            args=args,
+            kwargs={"activate": activate, **kwargs},
+            name="registry-load",
+            daemon=True,
+        ).start()
+        return True
+
+    def _load_and_report(self, *args, **kwargs):
+        try:
+            self.load(*args, **kwargs)
+        except Exception as e:
+            logger.exception("Failed to load a new model version")
+            with self._lock:
+                self.last_error = repr(e)
+        finally:
+            with self._lock:
+                self.loading = None
+
+    def warmup(self, recommender):
+        # First calls pay for lazy allocations and page faults on the
+        # memory-mapped artifacts; take that hit before serving traffic.
+        started = time.perf_counter()
+        recommender.recommend_batch(self.warmup_queries)
+        logger.info(
+            f"Warmed up version {recommender.version} "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+
+    def promote(self):
+        with self._lock:
+            if self.candidate is None:
+                raise LookupError("No candidate version loaded")
+            self.active, self.candidate = self.candidate, None
+            self._samples.clear()
+            return self.active
+
+    def discard(self):
+        with self._lock:
+            self.candidate = None
+            self._samples.clear()
+
+    def replace(self, expected, recommender):
+        """Swap in recommender only if expected is still the active one."""
+        with self._lock:
+            if self.active is not expected:
+                return False
+            self.active = recommender
+            return True
+
+    def shadow(self, queries, top_n, active_results, active_seconds):
+        candidate = self.candidate
+        if candidate is None or self._random.random() >= self.shadow_rate:
+            return
+        if not self._shadow_slot.acquire(blocking=False):
+            with self._lock:
+                self.shadow_dropped += 1
+            return
+        future = self._shadow_executor.submit(
+            self._score_shadow,
+            candidate,
+            queries,
+            top_n,
+            active_results,
+            active_seconds,
+        )
+        future.add_done_callback(lambda _: self._shadow_slot.release())
+
+    def _score_shadow(self, candidate, queries, top_n, active_results, active_seconds):
+        try:
+            started = time.perf_counter()
+            results = candidate.recommend_batch(queries, top_n)
+            candidate_seconds = time.perf_counter() - started
+        except Exception:
+            logger.exception(f"Shadow scoring failed for version {candidate.version}")
+            return
+
+        overlaps = []
+        for expected, found in zip(active_results, results):
+            expected = {record["drink_title"] for record in expected}
+            found = {record["drink_title"] for record in found}
+            size = max(len(expected), len(found))
+            overlaps.append(len(expected & found) / size if size else 1.0)
+        with self._lock:
+            if self.candidate is candidate:
+                self._samples.append(
+                    (active_seconds, candidate_seconds, float(np.mean(overlaps)))
+                )
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                "active": self.active.version if self.active else None,
+                "candidate": self.candidate.version if self.candidate else None,
+                "loading": self.loading,
+                "last_error": self.last_error,
+            }
+            samples = np.array(self._samples).reshape(-1, 3)
+            dropped = self.shadow_dropped
+        if stats["candidate"] is not None:
+            stats["shadow"] = {"samples": len(samples), "dropped": dropped}
+            if len(samples):
+                for i, name in enumerate(("active", "candidate")):
+                    p50, p95, p99 = np.percentile(samples[:, i] * 1000, [50, 95, 99])
+                    stats["shadow"][f"{name}_ms"] = {
+                        "p50": p50,
+                        "p95": p95,
+                        "p99": p99,
+                    }
+                stats["shadow"]["mean_overlap"] = float(samples[:, 2].mean())
+        return stats
+
+    def shutdown(self):
+        self._shadow_executor.shutdown(wait=False)
@@ -1,64 +1,167 @@
-import pickle
+import copy
 
+import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import linear_kernel
 
+from utils import ranking
+from utils.fallback_vectorizer import HashingFallbackVectorizer
+from utils.inverted_index import InvertedIndex
+from utils.tfidf_store import load_tfidf
+
 
 class TfidfRecommender:
     def __init__(
-        self, df: pd.DataFrame, vectorizer: TfidfVectorizer, tfidf_matrix, threshold=0.1
+        self,
+        df: pd.DataFrame,
+        vectorizer: TfidfVectorizer,
+        tfidf_matrix,
+        threshold=0.1,
+        inverted_index=None,
     ):
         self.df = df
         self.vectorizer = vectorizer
         self.tfidf_matrix = tfidf_matrix
         self.threshold = threshold
+        if inverted_index is None:
+            inverted_index = InvertedIndex.from_matrix(tfidf_matrix)
+        self.inverted_index = inverted_index or None
+        # Documents ingested since the last compaction, and deleted rows.
+        self.delta_matrix = None
+        self.deleted = np.empty(0, dtype=np.int64)
 
     @classmethod
-    def from_files(
-        cls, data_path: str, vectorizer_path: str, matrix_path: str, threshold=0.1
-    ):
+    def from_files(cls, data_path: str, model_path: str, threshold=0.1):
         df = pd.read_csv(data_path)
-        with open(vectorizer_path, "rb") as file:
-            vectorizer = pickle.load(file)
-        with open(matrix_path, "rb") as file:
-            tfidf_matrix = pickle.load(file)
-        return cls(df, vectorizer, tfidf_matrix, threshold)
+        vectorizer, tfidf_matrix, inverted_index = load_tfidf(model_path)
+        return cls(df, vectorizer, tfidf_matrix, threshold, inverted_index)
 
     def _get_query_vector(self, query):
-        return self.vectorizer.transform([query])
+        return self._get_query_vectors([query])
 
-    def recommend(self, query, top_n=10):
-        query_vec = self._get_query_vector(query)
-        relevance_scores = linear_kernel(query_vec, self.tfidf_matrix).flatten()
+    def _get_query_vectors(self, queries):
+        if isinstance(self.vectorizer, HashingFallbackVectorizer):
+            # Unseen query terms must not lower scores against the catalogue.
+            return self.vectorizer.transform(queries, norm_known_only=True)
+        return self.vectorizer.transform(queries)
 
-        top_indices = [
-            i
-            for i in relevance_scores.argsort()[::-1]
-            if relevance_scores[i] > self.threshold
-        ][:top_n]
+    def _derive(self, **changes):
+        derived = copy.copy(self)
+        derived.__dict__.update(changes)
+        return derived
 
-        if not top_indices:
-            return []
+    def with_documents(self, df):
+        """Append rows of df without refitting: unseen terms are hashed."""
+        if df.empty:
+            return self
+        vectorizer = self.vectorizer
+        if not isinstance(vectorizer, HashingFallbackVectorizer):
+            vectorizer = HashingFallbackVectorizer(vectorizer)
+        vectors = vectorizer.transform(df["whole_text"])
+        if self.delta_matrix is not None:
+            vectors = sparse.vstack((self.delta_matrix, vectors), format="csr")
+        return self._derive(
+            df=pd.concat([self.df, df], ignore_index=True),
+            vectorizer=vectorizer,
+            delta_matrix=vectors,
+        )
 
-        return (
-            self.df[
-                [
-                    "drink_title",
-                    "drink_glass",
-                    "garnish",
-                    "comment",
-                    "history",
-                    "how_to_translated",
-                ]
-            ]
-            .iloc[top_indices]
-            .fillna("")
-            .to_dict(orient="records")
+    def without_documents(self, titles):
+        positions = np.flatnonzero(self.df["drink_title"].isin(titles))
+        return self._derive(deleted=np.union1d(self.deleted, positions))
+
+    def needs_compaction(self, max_delta_fraction=0.1):
+        pending = len(self.deleted)
+        if self.delta_matrix is not None:
+            pending += self.delta_matrix.shape[0]
+        return pending > max_delta_fraction * self.tfidf_matrix.shape[0]
+
+    def compacted(self):
+        """Fold appended and deleted documents into a rebuilt posting index."""
+        alive = np.setdiff1d(np.arange(len(self.df)), self.deleted)
+        tfidf_matrix = sparse.csr_matrix(self.tfidf_matrix)
+        if self.delta_matrix is not None:
+            tfidf_matrix = sparse.vstack(
+                (
+                    _with_columns(tfidf_matrix, self.delta_matrix.shape[1]),
+                    self.delta_matrix,
+                ),
+                format="csr",
+            )
+        tfidf_matrix = tfidf_matrix[alive]
+        inverted_index = None
+        if self.inverted_index is not None:
+            inverted_index = InvertedIndex.from_matrix(tfidf_matrix)
+        return self._derive(
+            df=self.df.iloc[alive].reset_index(drop=True),
+            tfidf_matrix=tfidf_matrix,
+            inverted_index=inverted_index,
+            delta_matrix=None,
+            deleted=self.deleted[:0],
         )
 
-    def get_relevance_scores(self, query):
-        query_vec = self._get_query_vector(query)
+    def _search_main(self, query_vecs, top_n, threshold=None):
+        if self.inverted_index is not None:
+            return [
+                self.inverted_index.search(query_vec, top_n, threshold)
+                for query_vec in query_vecs
+            ]
+
+        relevance_scores = (query_vecs @ self.tfidf_matrix.T).toarray()
+        return [ranking.top_n(scores, top_n, threshold) for scores in relevance_scores]
+
+    def _search(self, query_vecs, top_n, threshold=None):
+        # Hashed columns only exist in documents appended after fitting.
+        main_vecs = query_vecs[:, : self.tfidf_matrix.shape[1]]
+        if self.delta_matrix is None and not len(self.deleted):
+            return self._search_main(main_vecs, top_n, threshold)
+
+        # Over-fetch so deleted documents can be dropped without a shortfall.
+        n = top_n + len(self.deleted)
+        results = self._search_main(main_vecs, n, threshold)
+        if self.delta_matrix is not None:
+            offset = self.tfidf_matrix.shape[0]
+            delta_scores = (query_vecs @ self.delta_matrix.T).toarray()
+            results = [
+                [main, (indices + offset, scores)]
+                for main, (indices, scores) in zip(
+                    results,
+                    (ranking.top_n(scores, n, threshold) for scores in delta_scores),
+                )
+            ]
+        else:
+            results = [[main] for main in results]
+        return [
+            ranking.merge_top_n(result, top_n, excluded=self.deleted)
+            for result in results
+        ]
+
+    def recommend(self, query, top_n=10):
+        return self.recommend_batch([query], top_n)[0]
+
+    def recommend_batch(self, queries, top_n=10):
+        if not queries:
+            return []
+        query_vecs = self._get_query_vectors(queries)
+        return [
+            ranking.to_records(self.df, *result)
+            for result in self._search(query_vecs, top_n, self.threshold)
+        ]
+
+    def get_relevance_scores(self, query, top_n=None):
+        query_vec = self._get_query_vector(query)[:, : self.tfidf_matrix.shape[1]]
         relevance_scores = linear_kernel(query_vec, self.tfidf_matrix).flatten()
 
-        return relevance_scores[relevance_scores.argsort()[::-1]]
+        if top_n is None:
+            top_n = len(relevance_scores)
+        return ranking.top_n(relevance_scores, top_n)[1]
+
+
+def _with_columns(matrix, n_columns):
+    # Widen a CSR matrix with empty trailing columns, without copying.
+    return sparse.csr_matrix(
+        (matrix.data, matrix.indices, matrix.indptr),
+        shape=(matrix.shape[0], n_columns),
+    )
@@ -0,0 +1,90 @@
+import argparse
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+from scripts.cocktail_scraper import (
+    ARTICLE_CLASS,
+    LINK_CLASS,
+    PARSERS,
+    parse_page,
+)
+
+FIXTURES = Path(__file__).resolve().parent.parent / "test" / "fixtures" / "html"
+
+LEGACY_PATTERNS = {
+    "drink_glass": r"Servir em (.*?) Fotografado",
+    "garnish": r"Decoração: (.*?) Como fazer:",
+    "how_to": r"Como fazer: (.*?) Loading...",
+    "comment": r"Comentários: (.*?) História:",
+    "history": r"História: (.*?) Nutrition:",
+    "nutrition": r"Nutrition: (.*?) cal",
+    "alcohol_content": r"Alcohol content: (.*?) grams of pure alcohol",
+}
+
+
+def legacy_parse(html, url, parser=None):
+    """The extraction stage as it was: full html.parser tree, one regex per field."""
+    soup = BeautifulSoup(html, "html.parser")
+    text = re.sub(r"\s+", " ", soup.find("article", class_=ARTICLE_CLASS).text.strip())
+    record = {}
+    for key, pattern in LEGACY_PATTERNS.items():
+        match = re.search(pattern, text, re.DOTALL)
+        record[key] = match.group(1).strip() if match else None
+    record["drink_title"] = url.split("/")[-1]
+    record["path"] = url
+    links = soup.find_all("a", class_=LINK_CLASS, href=True)
+    return record, links[0].get("href"), links[1].get("href")
+
+
+def pages_per_second(parse, pages, parser, workers=0):
+    started = time.perf_counter()
+    if workers:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(
+                pool.map(
+                    parse,
+                    [html for html, _ in pages],
+                    [url for _, url in pages],
+                    [parser] * len(pages),
+                    chunksize=16,
+                )
+            )
+    else:
+        for html, url in pages:
+            parse(html, url, parser)
+    return len(pages) / (time.perf_counter() - started)
+
+
+def available_parsers():
+    for name, backend in PARSERS.items():
+        try:
+            backend("<html></html>")
+        except Exception:
+            continue
+        yield name
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Recipe page extraction throughput over saved HTML fixtures"
+    )
+    parser.add_argument("--fixtures", default=str(FIXTURES))
+    parser.add_argument("--pages", type=int, default=600)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    fixtures = [
+        (path.read_text(encoding="utf-8"), f"/recipe/{path.stem}")
+        for path in sorted(Path(args.fixtures).glob("*.html"))
+    ]
+    pages = (fixtures * (args.pages // len(fixtures) + 1))[: args.pages]
+
+    print(f"{len(pages)} pages from {len(fixtures)} fixtures")
+    print(f"legacy       {pages_per_second(legacy_parse, pages, None):8.1f} pages/s")
+    for name in available_parsers():
+        print(f"{name:<12} {pages_per_second(parse_page, pages, name):8.1f} pages/s")
+        rate = pages_per_second(parse_page, pages, name, args.workers)
+        print(f"{name:<12} {rate:8.1f} pages/s with {args.workers} processes")
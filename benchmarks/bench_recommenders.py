@@ -0,0 +1,329 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from benchmarks.synthetic import (
+    DATA_FILE,
+    GLOVE_DIR,
+    TFIDF_DIR,
+    make_queries,
+    write_corpus,
+)
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+WORKDIR = Path(__file__).resolve().parent / "data"
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def glove_recommender():
+    from app.glove_recommender import GloVeRecommender
+
+    return GloVeRecommender, GLOVE_DIR
+
+
+def tfidf_recommender():
+    from app.tfidf_recommender import TfidfRecommender
+
+    return TfidfRecommender, TFIDF_DIR
+
+
+RECOMMENDERS = {"glove": glove_recommender, "tfidf": tfidf_recommender}
+
+
+def percentiles_ms(seconds):
+    p50, p95, p99 = np.percentile(np.asarray(seconds) * 1000, [50, 95, 99])
+    return {"p50": p50, "p95": p95, "p99": p99}
+
+
+def measure(kind, path, n_queries, batch_size):
+    """Load one recommender and time it; run in a fresh process per recommender."""
+    started = time.perf_counter()
+    recommender_class, artifact_dir = RECOMMENDERS[kind]()
+    import_seconds = time.perf_counter() - started
+
+    path = Path(path)
+    started = time.perf_counter()
+    recommender = recommender_class.from_files(path / DATA_FILE, path / artifact_dir)
+    load_seconds = time.perf_counter() - started
+
+    n_batches = max(1, n_queries // batch_size)
+    queries = make_queries(n_queries + n_batches * batch_size)
+    single, batched = queries[:n_queries], queries[n_queries:]
+
+    latencies = []
+    for query in single:
+        started = time.perf_counter()
+        recommender.recommend(query)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for start in range(0, len(batched), batch_size):
+        recommender.recommend_batch(batched[start : start + batch_size])
+    batch_seconds = time.perf_counter() - started
+
+    return {
+        "import_seconds": import_seconds,
+        "load_seconds": load_seconds,
+        "peak_rss_mb": peak_rss_mb(os.getpid()),
+        "latency_ms": percentiles_ms(latencies),
+        "batch_size": batch_size,
+        "batch_queries_per_second": len(batched) / batch_seconds,
+    }
+
+
+def measure_in_subprocess(kind, path, n_queries, batch_size):
+    # A new interpreter per run, so imports, load time and peak RSS are not
+    # shared with earlier runs. The OS page cache is still warm after the
+    # corpus is written, so load time excludes disk reads.
+    with tempfile.NamedTemporaryFile(suffix=".json") as result:
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.bench_recommenders",
+                "--child",
+                kind,
+                str(path),
+                result.name,
+                "--queries",
+                str(n_queries),
+                "--batch-size",
+                str(batch_size),
+            ],
+            cwd=ROOT,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        with open(result.name, encoding="utf-8") as f:
+            return json.load(f)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def load_test(base_url, queries, concurrency):
+    slots = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], {}
+
+    async def one(client, query):
+        async with slots:
+            started = time.perf_counter()
+            response = await client.get("/query", params={"query": query})
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(one(client, query) for query in queries))
+        seconds = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": len(queries),
+        "requests_per_second": len(queries) / seconds,
+        "latency_ms": percentiles_ms(latencies),
+        "status_codes": {str(code): n for code, n in sorted(statuses.items())},
+    }
+
+
+def serve_and_load_test(path, n_requests, concurrency, startup_timeout=600):
+    """Run the API on the GloVe artifacts in path and drive /query concurrently."""
+    port = free_port()
+    env = {
+        **os.environ,
+        "RECSYS_DATA_PATH": str(path / DATA_FILE),
+        "RECSYS_ARTIFACT_PATH": str(path / GLOVE_DIR),
+        "RECSYS_SHADOW_RATE": "0",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        # The lifespan loads the model before the server accepts connections.
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            try:
+                httpx.get(f"{base_url}/models").raise_for_status()
+                break
+            except httpx.TransportError:
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("API server did not start")
+                time.sleep(0.2)
+
+        queries = make_queries(n_requests, seed=2)
+        result = asyncio.run(load_test(base_url, queries, concurrency))
+        result["peak_rss_mb"] = peak_rss_mb(server.pid)
+        return result
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def peak_rss_mb(pid):
+    # VmHWM starts over at exec, unlike ru_maxrss, which a child inherits
+    # from the process that forked it.
+    with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return None
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+RUN_METRICS = [
+    "load_seconds",
+    "peak_rss_mb",
+    "batch_queries_per_second",
+    "latency_ms.p50",
+    "latency_ms.p99",
+]
+HTTP_METRICS = [
+    "requests_per_second",
+    "peak_rss_mb",
+    "latency_ms.p50",
+    "latency_ms.p99",
+]
+
+
+def _metric(run, name):
+    for key in name.split("."):
+        run = run.get(key) if isinstance(run, dict) else None
+    return run
+
+
+def compare(old, new):
+    """Print new/old ratios for every metric measured in both reports.
+
+    Metrics missing or zero in either report are left out rather than
+    divided by.
+    """
+    for section, metrics in (("results", RUN_METRICS), ("http", HTTP_METRICS)):
+        old_runs = {
+            (r["n_docs"], r.get("recommender")): r for r in old.get(section, [])
+        }
+        for run in new.get(section, []):
+            before = old_runs.get((run["n_docs"], run.get("recommender")))
+            if before is None:
+                continue
+            changes = []
+            for name in metrics:
+                after, previous = _metric(run, name), _metric(before, name)
+                if after and previous:
+                    changes.append(f"{name.split('.')[-1]} x{after / previous:.2f}")
+            if changes:
+                label = run.get("recommender", "/query")
+                print(f"{label:<6} {run['n_docs']:>8}: {', '.join(changes)}")
+
+
+def run(args):
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": [],
+        "http": [],
+    }
+    for n_docs in args.sizes:
+        path = Path(args.workdir) / str(n_docs)
+        if args.regenerate or not (path / DATA_FILE).exists():
+            started = time.perf_counter()
+            write_corpus(path, n_docs)
+            print(
+                f"Generated {n_docs} documents in {time.perf_counter() - started:.1f}s"
+            )
+
+        for kind in args.recommenders:
+            result = measure_in_subprocess(kind, path, args.queries, args.batch_size)
+            report["results"].append({"n_docs": n_docs, "recommender": kind, **result})
+            latency = result["latency_ms"]
+            print(
+                f"{kind:<6} {n_docs:>8} docs: load {result['load_seconds']:.2f}s, "
+                f"rss {result['peak_rss_mb']:.0f} MiB, p50 {latency['p50']:.2f} ms, "
+                f"p99 {latency['p99']:.2f} ms, "
+                f"batch {result['batch_queries_per_second']:.0f} q/s"
+            )
+
+        if args.http_requests:
+            result = serve_and_load_test(path, args.http_requests, args.concurrency)
+            report["http"].append({"n_docs": n_docs, **result})
+            print(
+                f"/query  {n_docs:>8} docs: {result['requests_per_second']:.0f} req/s "
+                f"at concurrency {args.concurrency}, "
+                f"p99 {result['latency_ms']['p99']:.1f} ms, {result['status_codes']}"
+            )
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Load time, memory, latency and throughput of both recommenders "
+        "on synthetic corpora"
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument(
+        "--recommenders",
+        nargs="+",
+        choices=sorted(RECOMMENDERS),
+        default=sorted(RECOMMENDERS),
+    )
+    parser.add_argument("--workdir", default=str(WORKDIR))
+    parser.add_argument("--regenerate", action="store_true")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument(
+        "--http-requests",
+        type=int,
+        default=1000,
+        help="requests per size against a local API server; 0 skips it",
+    )
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--output", default="bench_recommenders.json")
+    parser.add_argument("--compare", metavar="REPORT", help="an earlier --output")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        kind, path, result_path = args.child
+        with open(result_path, "w", encoding="utf-8") as f:
+            json.dump(measure(kind, path, args.queries, args.batch_size), f)
+    else:
+        run(args)
@@ -0,0 +1,89 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DATA_FILE = "cocktail_data.csv"
+GLOVE_DIR = "glove"
+TFIDF_DIR = "tfidf"
+
+
+def word_distribution(vocab_size, exponent=1.1):
+    # Zipf-like frequencies, as in natural text.
+    weights = 1.0 / np.arange(1, vocab_size + 1) ** exponent
+    return weights / weights.sum()
+
+
+def make_words(vocab_size):
+    return np.array([f"w{i}" for i in range(vocab_size)], dtype=object)
+
+
+def make_texts(n, length, vocab_size=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    words = make_words(vocab_size)
+    ids = rng.choice(vocab_size, size=(n, length), p=word_distribution(vocab_size))
+    return [" ".join(row) for row in words[ids]]
+
+
+def make_corpus(n_docs, vocab_size=20000, words_per_doc=40, seed=0):
+    texts = make_texts(n_docs, words_per_doc, vocab_size, seed)
+    return pd.DataFrame(
+        {
+            "drink_title": [f"drink-{i}" for i in range(n_docs)],
+            "drink_glass": "Coupe",
+            "garnish": "",
+            "comment": "",
+            "history": "",
+            "how_to_translated": texts,
+            "whole_text": texts,
+        }
+    )
+
+
+def make_queries(n, vocab_size=20000, words_per_query=4, seed=1):
+    # Distinct queries, so neither the query vector nor the result cache hits.
+    return list(dict.fromkeys(make_texts(n * 2, words_per_query, vocab_size, seed)))[:n]
+
+
+def write_corpus(path, n_docs, vocab_size=20000, words_per_doc=40, dim=300, seed=0):
+    """Write a CSV plus GloVe and TF-IDF artifacts for n_docs synthetic documents.
+
+    Word vectors and autoencoder weights are random: the artifacts have the
+    shapes and sizes of real ones, not their quality.
+    """
+    # Imported here so measuring one recommender does not load the other's
+    # dependencies through make_queries.
+    import torch
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    from utils.artifacts import ArtifactBundle
+    from utils.autoencoder import Autoencoder
+    from utils.tfidf_store import save_tfidf
+    from utils.tokenizer import MyTokenizer
+    from utils.train_embedding import embed_corpus
+
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    df = make_corpus(n_docs, vocab_size, words_per_doc, seed)
+    df.to_csv(path / DATA_FILE, index=False)
+
+    torch.manual_seed(seed)
+    tokenizer = MyTokenizer(sentence_length=words_per_doc, case_sensitive=False)
+    tokenizer.fit(df.whole_text)
+    embedding_matrix = (
+        np.random.default_rng(seed)
+        .standard_normal((tokenizer.vocab_size, dim))
+        .astype(np.float32)
+    )
+    embedding_matrix[tokenizer.vocab["<PAD>"]] = 0
+    model = Autoencoder(dim, 200, 100)
+    embeddings = embed_corpus(df.whole_text, tokenizer, embedding_matrix, model)
+    ArtifactBundle(tokenizer, embedding_matrix, model, embeddings).save(
+        path / GLOVE_DIR
+    )
+
+    vectorizer = TfidfVectorizer(
+        strip_accents="unicode", stop_words="english", lowercase=True
+    )
+    save_tfidf(path / TFIDF_DIR, vectorizer, vectorizer.fit_transform(df.whole_text))
+    return path
@@ -1,79 +1,213 @@
+import importlib.util
+import json
 import logging
-import re
-from typing import Dict, Tuple
+import os
+from pathlib import Path
+from typing import Dict
 
 import pandas as pd
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from logs.logger import Logger
 
-Logger.setup_log(log_level=logging.INFO, local_dir="./logs")
 logger = logging.getLogger(__name__)
 
 
-class CocktailScraper:
-    def __init__(self):
-        self.df = pd.DataFrame(
-            columns=[
-                "drink_title",
-                "drink_glass",
-                "garnish",
-                "how_to",
-                "comment",
-                "history",
-                "nutrition",
-                "alcohol_content",
-                "path",
-            ]
-        )
+COLUMNS = [
+    "drink_title",
+    "drink_glass",
+    "garnish",
+    "how_to",
+    "comment",
+    "history",
+    "nutrition",
+    "alcohol_content",
+    "path",
+]
+
+ARTICLE_CLASS = "cell long-form long-form--small long-form--inline-paragraph pad-bottom"
+LINK_CLASS = "cell small-6 colour-inherit opacity-hover"
+
+# Each field is the text between its start and end marker, like the regex
+# "start (.*?) end" over whitespace-normalized text, but found with str.find.
+FIELDS = [
+    ("drink_glass", "Servir em ", " Fotografado"),
+    ("garnish", "Decoração: ", " Como fazer:"),
+    ("how_to", "Como fazer: ", " Loading..."),
+    ("comment", "Comentários: ", " História:"),
+    ("history", "História: ", " Nutrition:"),
+    ("nutrition", "Nutrition: ", " cal"),
+    ("alcohol_content", "Alcohol content: ", " grams of pure alcohol"),
+]
 
-    def extract_cocktail_info(self, text: str) -> Dict[str, str]:
-        text = re.sub(r"\s+", " ", text)
-        patterns = {
-            "drink_glass": r"Servir em (.*?) Fotografado",
-            "garnish": r"Decoração: (.*?) Como fazer:",
-            "how_to": r"Como fazer: (.*?) Loading...",
-            "comment": r"Comentários: (.*?) História:",
-            "history": r"História: (.*?) Nutrition:",
-            "nutrition": r"Nutrition: (.*?) cal",
-            "alcohol_content": r"Alcohol content: (.*?) grams of pure alcohol",
-        }
-
-        extracted_info = {}
-
-        for key, pattern in patterns.items():
-            match = re.search(pattern, text, re.DOTALL)
-            if match:
-                extracted_info[key] = match.group(1).strip()
-            else:
-                extracted_info[key] = None
-
-        return extracted_info
-
-    def get_next_cocktails(self, soup: BeautifulSoup) -> Tuple[str, str]:
-        information_div = soup.find_all(
-            "a", class_="cell small-6 colour-inherit opacity-hover", href=True
+
+def extract_cocktail_info(text: str) -> Dict[str, str]:
+    text = " ".join(text.split())
+    extracted_info = {}
+    for key, start_marker, end_marker in FIELDS:
+        start = text.find(start_marker)
+        end = -1
+        if start >= 0:
+            start += len(start_marker)
+            end = text.find(end_marker, start)
+        extracted_info[key] = text[start:end].strip() if end >= 0 else None
+    return extracted_info
+
+
+def _soup_backend(parser):
+    # Only build the tree for the tags that are read.
+    strainer = SoupStrainer(["article", "a"])
+
+    def parse(html):
+        soup = BeautifulSoup(html, parser, parse_only=strainer)
+        article = soup.find("article", class_=ARTICLE_CLASS)
+        links = soup.find_all("a", class_=LINK_CLASS, href=True)
+        return (
+            article.text.strip() if article is not None else None,
+            [link.get("href") for link in links],
         )
-        if len(information_div) < 2:
-            logger.warning("Not enough links found for next cocktails")
-            return "", ""
-        return (information_div[0].get("href"), information_div[1].get("href"))
 
-    def scrape_cocktail_details(self, soup: BeautifulSoup, current_url: str) -> None:
-        try:
-            information_div = soup.find(
-                "article",
-                class_="cell long-form long-form--small long-form--inline-paragraph pad-bottom",
-            ).text.strip()
-            cocktail_data = self.extract_cocktail_info(information_div)
+    return parse
+
+
+def _selectolax_backend(html):
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    article = tree.css_first("article." + ".".join(ARTICLE_CLASS.split()))
+    links = tree.css("a." + ".".join(LINK_CLASS.split()) + "[href]")
+    return (
+        article.text(deep=True, separator="").strip() if article is not None else None,
+        [link.attributes["href"] for link in links],
+    )
+
+
+# Backends map page HTML to (article text or None, recipe link hrefs).
+PARSERS = {
+    "html.parser": _soup_backend("html.parser"),
+    "lxml": _soup_backend("lxml"),
+    "selectolax": _selectolax_backend,
+}
+DEFAULT_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+
+def parse_page(html: str, url: str, parser: str = DEFAULT_PARSER):
+    """(record or None, previous link, next link) for one recipe page.
+
+    A plain function of its arguments, so it can run in a worker process.
+    """
+    article_text, links = PARSERS[parser](html)
+    record = None
+    if article_text is not None:
+        record = extract_cocktail_info(article_text)
+        record["drink_title"] = url.split("/")[-1]
+        record["path"] = url
+    previous, nxt = links[:2] if len(links) >= 2 else ("", "")
+    return record, previous, nxt
+
+
+class MemorySink:
+    def __init__(self):
+        self._records = []
+
+    def append(self, record: dict) -> None:
+        self._records.append(record)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def records(self):
+        return iter(self._records)
+
+    def __len__(self):
+        return len(self._records)
+
+
+class JsonlSink:
+    """Append-only JSON Lines file, fsynced every fsync_every records.
+
+    Reopening an existing file resumes it: a line torn by a crash is cut off
+    and the records before it are kept.
+    """
+
+    def __init__(self, path, fsync_every: int = 50):
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self.count = 0
+        if self.path.exists():
+            self._recover()
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._pending = 0
+
+    def _recover(self):
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                logger.warning(f"Dropping a torn record at the end of {self.path}")
+                f.truncate(end)
+        self.count = data[:end].count(b"\n")
+
+    def append(self, record: dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.count += 1
+        self._pending += 1
+        if self._pending >= self.fsync_every:
+            self.flush()
+
+    def flush(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def records(self):
+        if not self._file.closed:
+            self._file.flush()
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def __len__(self):
+        return self.count
+
+
+class CocktailScraper:
+    parse_page = staticmethod(parse_page)
+
+    def __init__(self, sink=None, parser: str = DEFAULT_PARSER):
+        # Records are appended as they are scraped; a DataFrame is only built
+        # on demand, so a crawl costs O(1) per page however long it runs.
+        self.sink = sink if sink is not None else MemorySink()
+        self.parser = parser
+        self.paths = {record["path"] for record in self.sink.records()}
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return pd.DataFrame(list(self.sink.records()), columns=COLUMNS)
 
-            cocktail_data["drink_title"] = current_url.split("/")[-1]
-            cocktail_data["path"] = current_url
+    def __len__(self):
+        return len(self.sink)
 
-            self.df.loc[len(self.df)] = cocktail_data
-            logger.info(f"Scraped cocktail details from {current_url}")
-        except Exception as e:
-            logger.error(f"Error scraping details from {current_url}: {e}")
+    def add_record(self, record, current_url: str) -> None:
+        if current_url in self.paths:
+            # Re-fetched after resuming from a checkpoint older than the sink.
+            logger.debug(f"Already scraped {current_url}")
+            return
+        if record is None:
+            logger.error(f"No cocktail details found in {current_url}")
+            return
+        self.sink.append({column: record.get(column) for column in COLUMNS})
+        self.paths.add(current_url)
+        logger.info(f"Scraped cocktail details from {current_url}")
 
 
 if __name__ == "__main__":
+    Logger.setup_log(log_level=logging.INFO, local_dir="./logs")
     scraper = CocktailScraper()
@@ -1,17 +1,96 @@
+import asyncio
+import hashlib
+import json
 import logging
+import os
+import random
 import time
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from email.utils import parsedate_to_datetime
 from pathlib import Path
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
 
-import requests
-from bs4 import BeautifulSoup
-from cocktail_scraper import CocktailScraper
+import httpx
 from logs.logger import Logger
 
-Logger.setup_log(log_level=logging.INFO, local_dir="./logs")
 logger = logging.getLogger(__name__)
 
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CHECKPOINT_FILE = "frontier.json"
+
+
+class TokenBucket:
+    """Allows rate requests per second on average, in bursts of up to capacity."""
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.updated = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = self.clock()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HttpCache:
+    """Validators and bodies of fetched pages, for conditional GETs on re-crawls."""
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.index = {}
+        if (self.path / self.INDEX_FILE).exists():
+            with open(self.path / self.INDEX_FILE, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    def _body_path(self, url):
+        return self.path / f"{hashlib.sha1(url.encode()).hexdigest()}.html"
+
+    def conditional_headers(self, url):
+        entry = self.index.get(url)
+        if entry is None or not self._body_path(url).exists():
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def body(self, url):
+        return self._body_path(url).read_text(encoding="utf-8")
+
+    def put(self, url, response):
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        self._body_path(url).write_text(response.text, encoding="utf-8")
+        self.index[url] = {"etag": etag, "last_modified": last_modified}
+
+    def save(self):
+        tmp_path = self.path / f"{self.INDEX_FILE}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.path / self.INDEX_FILE)
+
 
 class Crawler:
     def __init__(
@@ -20,107 +99,299 @@ class Crawler:
         start_url: str,
         user_agent: str = "Mozilla/5.0",
         crawl_limit: int = 10,
+        concurrency: int = 8,
+        requests_per_second: float = 1.0,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        max_retry_after: float = None,
+        timeout: float = 30.0,
+        data_dir: str = "data",
+        model_dir: str = "model",
+        data_path: str = None,
+        checkpoint_every: int = 25,
+        parse_workers: int = 1,
     ):
+        """Pass the data_path of an interrupted crawl to resume it."""
         self.base_url = base_url
         self.start_url = start_url
         self.crawl_limit = crawl_limit
-        self.session = requests.Session()
+        self.concurrency = concurrency
+        self.requests_per_second = requests_per_second
+        self.max_retries = max_retries
+        self.backoff = backoff
+        # A server's Retry-After is honoured up to this many seconds.
+        self.max_retry_after = (
+            backoff * 2**max_retries if max_retry_after is None else max_retry_after
+        )
+        self.timeout = timeout
+        self.user_agent = user_agent
         self.headers = {"User-Agent": user_agent}
         self.visited_urls = set()
         self.nxt_queue = deque([start_url])
         self.prev_queue = deque()
-        now = datetime.now().strftime("%m%d%Y_%H%M")
-        self.data_path = f"data/{now}/crlmt_{self.crawl_limit}"
-        self.model_path = f"model/{now}/crlmt_{self.crawl_limit}"
+        self.in_flight = set()
+        self.checkpoint_every = checkpoint_every
+        self.pages_since_checkpoint = 0
+        self.parse_workers = parse_workers
+        self._parse_pool = None
+        self.robots = {}
+        self.buckets = {}
+        self.cache = HttpCache(f"{data_dir}/http_cache")
+        self.resuming = data_path is not None
+        if data_path is None:
+            now = datetime.now().strftime("%m%d%Y_%H%M")
+            data_path = f"{data_dir}/{now}/crlmt_{self.crawl_limit}"
+        self.data_path = str(data_path)
+        try:
+            run_name = Path(data_path).relative_to(data_dir)
+        except ValueError:
+            run_name = Path(data_path).name
+        self.model_path = str(Path(model_dir) / run_name)
+        self.checkpoint_path = Path(self.data_path) / CHECKPOINT_FILE
         Path(self.data_path).mkdir(parents=True, exist_ok=True)
         Path(self.model_path).mkdir(parents=True, exist_ok=True)
         logger.info(
             f"Initialized Crawler with base_url={base_url}, start_url={start_url}, crawl_limit={crawl_limit}"
         )
 
-    def get_soup(self, url: str) -> BeautifulSoup:
-        try:
-            response = self.session.get(self.base_url + url, headers=self.headers)
-            response.raise_for_status()
-            logger.debug(f"Successfully fetched URL: {url}")
-            return BeautifulSoup(response.text, "html.parser")
-        except requests.RequestException as e:
-            logger.error(f"Request failed for URL {url}: {e}")
-            return None
+    async def _host_policy(self, client, url):
+        """robots.txt rules and the request rate limiter for url's host."""
+        parts = urlsplit(url)
+        host = parts.netloc
+        if host not in self.robots:
+            robots = RobotFileParser()
+            try:
+                response = await client.get(
+                    f"{parts.scheme}://{host}/robots.txt", headers=self.headers
+                )
+                if response.status_code in (401, 403):
+                    robots.disallow_all = True
+                elif response.status_code >= 400:
+                    robots.allow_all = True
+                else:
+                    robots.parse(response.text.splitlines())
+            except httpx.HTTPError as e:
+                logger.warning(f"Could not fetch robots.txt for {host}: {e}")
+                robots.allow_all = True
+            self.robots[host] = robots
 
-    def process_queue(self, queue: deque, scraper: "CocktailScraper") -> None:
-        while queue and len(scraper.df) < self.crawl_limit:
-            current_url = queue.popleft()
-            if current_url in self.visited_urls:
-                continue
+            crawl_delay = robots.crawl_delay(self.user_agent)
+            rate = 1 / crawl_delay if crawl_delay else self.requests_per_second
+            self.buckets[host] = TokenBucket(rate)
+            logger.info(f"Crawling {host} at {rate:.2f} requests/s")
+        return self.robots[host], self.buckets[host]
 
-            self.visited_urls.add(current_url)
-            logger.info(f"Visiting {current_url}")
+    def _retry_delay(self, attempt, response=None):
+        delay = self._retry_after(response)
+        if delay is not None:
+            return min(delay, self.max_retry_after)
+        # Exponential backoff with full jitter.
+        return random.uniform(0, self.backoff * 2**attempt)
 
+    @staticmethod
+    def _retry_after(response):
+        retry_after = (
+            response.headers.get("Retry-After") if response is not None else None
+        )
+        if retry_after:
             try:
-                soup = self.get_soup(current_url)
-                if not soup:
-                    continue
+                return float(retry_after)
+            except ValueError:
+                try:
+                    return max(
+                        0.0,
+                        parsedate_to_datetime(retry_after).timestamp() - time.time(),
+                    )
+                except (TypeError, ValueError):
+                    pass
+        return None
 
-                scraper.scrape_cocktail_details(soup, current_url)
-                previous, nxt = scraper.get_next_cocktails(soup)
+    async def fetch(self, client, url: str):
+        """Page text, from the cache when the server answers 304; None on failure."""
+        full_url = self.base_url + url
+        robots, bucket = await self._host_policy(client, full_url)
+        if not robots.can_fetch(self.user_agent, full_url):
+            logger.info(f"Skipping {url}, disallowed by robots.txt")
+            return None
 
-                if nxt and nxt not in self.visited_urls:
-                    self.nxt_queue.append(nxt)
-                if previous and previous not in self.visited_urls:
-                    self.prev_queue.append(previous)
+        headers = {**self.headers, **self.cache.conditional_headers(full_url)}
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            response = None
+            try:
+                response = await client.get(full_url, headers=headers)
+            except httpx.HTTPError as e:
+                logger.warning(f"Request failed for URL {url}: {e}")
+            else:
+                if response.status_code == 304:
+                    logger.debug(f"Not modified: {url}")
+                    return self.cache.body(full_url)
+                if response.is_success:
+                    logger.debug(f"Successfully fetched URL: {url}")
+                    self.cache.put(full_url, response)
+                    return response.text
+                if response.status_code not in RETRY_STATUSES:
+                    logger.error(
+                        f"Request failed for URL {url}: {response.status_code}"
+                    )
+                    return None
 
-                logger.info(
-                    f"Processed {current_url}. Total records: {len(scraper.df)}"
-                )
-                time.sleep(3)
+            if attempt < self.max_retries:
+                delay = self._retry_delay(attempt, response)
+                logger.info(f"Retrying {url} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+        logger.error(f"Giving up on {url} after {self.max_retries + 1} attempts")
+        return None
 
-            except Exception as e:
-                logger.error(f"Error processing {current_url}: {e}")
+    def _pop_url(self):
+        for queue in (self.nxt_queue, self.prev_queue):
+            while queue:
+                url = queue.popleft()
+                if url not in self.visited_urls:
+                    self.visited_urls.add(url)
+                    self.in_flight.add(url)
+                    return url
+        return None
 
-            try:
-                scraper.df.to_csv(f"{self.data_path}/cocktail_data.csv", index=False)
-                logger.info(f"Data saved to {self.data_path}/cocktail_data.csv")
-            except Exception as e:
-                logger.error(f"Failed to save data: {e}")
+    def save_checkpoint(self, scraper: "CocktailScraper") -> None:
+        """Persist the frontier; pages still in flight go back to the queue."""
+        # Records must be durable before a frontier that counts them visited.
+        scraper.sink.flush()
+        self.cache.save()
+        state = {
+            "visited_urls": sorted(self.visited_urls - self.in_flight),
+            "nxt_queue": sorted(self.in_flight) + list(self.nxt_queue),
+            "prev_queue": list(self.prev_queue),
+        }
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+        self.pages_since_checkpoint = 0
+        logger.debug(f"Checkpoint saved to {self.checkpoint_path}")
 
-    def crawl(self, scraper: "CocktailScraper") -> None:
+    def load_checkpoint(self) -> bool:
+        if not self.checkpoint_path.exists():
+            return False
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        self.visited_urls = set(state["visited_urls"])
+        self.nxt_queue = deque(state["nxt_queue"])
+        self.prev_queue = deque(state["prev_queue"])
+        logger.info(
+            f"Resuming crawl from {self.checkpoint_path}: "
+            f"{len(self.visited_urls)} visited, "
+            f"{len(self.nxt_queue) + len(self.prev_queue)} queued"
+        )
+        return True
+
+    async def parse(self, scraper, text, url):
+        if self._parse_pool is None:
+            return scraper.parse_page(text, url, scraper.parser)
+        # Parsing is CPU-bound; in worker processes it overlaps with fetches
+        # instead of stalling the event loop.
+        return await asyncio.get_running_loop().run_in_executor(
+            self._parse_pool, scraper.parse_page, text, url, scraper.parser
+        )
+
+    async def process_url(self, client, url: str, scraper: "CocktailScraper") -> None:
+        logger.info(f"Visiting {url}")
         try:
-            while (self.nxt_queue or self.prev_queue) and len(
-                scraper.df
-            ) < self.crawl_limit:
-                if self.nxt_queue:
-                    self.process_queue(self.nxt_queue, scraper)
-                if self.prev_queue:
-                    self.process_queue(self.prev_queue, scraper)
+            text = await self.fetch(client, url)
+            if text is None or len(scraper) >= self.crawl_limit:
+                return
+
+            record, previous, nxt = await self.parse(scraper, text, url)
+            if len(scraper) >= self.crawl_limit:
+                return
+            scraper.add_record(record, url)
+            if not previous and not nxt:
+                logger.warning(f"Not enough links found for next cocktails on {url}")
+
+            if nxt and nxt not in self.visited_urls:
+                self.nxt_queue.append(nxt)
+            if previous and previous not in self.visited_urls:
+                self.prev_queue.append(previous)
+
+            logger.info(f"Processed {url}. Total records: {len(scraper)}")
+        except Exception as e:
+            logger.error(f"Error processing {url}: {e}")
+        finally:
+            self.in_flight.discard(url)
+
+        self.pages_since_checkpoint += 1
+        if self.pages_since_checkpoint >= self.checkpoint_every:
+            self.save_checkpoint(scraper)
 
-                if not self.nxt_queue and self.prev_queue:
-                    self.nxt_queue, self.prev_queue = self.prev_queue, self.nxt_queue
+    async def _worker(self, client, scraper, state):
+        while len(scraper) < self.crawl_limit:
+            async with state["changed"]:
+                # Wait for new links while another worker may still add some.
+                while (url := self._pop_url()) is None and state["active"]:
+                    await state["changed"].wait()
+            if url is None:
+                return
 
+            state["active"] += 1
             try:
-                scraper.df.to_csv(f"{self.data_path}/cocktail_data.csv", index=False)
-                logger.info(f"Final data saved to {self.data_path}/cocktail_data.csv")
-            except Exception as e:
-                logger.error(f"Failed to save final data: {e}")
+                await self.process_url(client, url, scraper)
+            finally:
+                state["active"] -= 1
+                async with state["changed"]:
+                    state["changed"].notify_all()
 
+    async def crawl_async(self, scraper: "CocktailScraper") -> None:
+        state = {"active": 0, "changed": asyncio.Condition()}
+        if self.parse_workers > 1:
+            self._parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        try:
+            async with httpx.AsyncClient(
+                timeout=self.timeout, follow_redirects=True
+            ) as client:
+                await asyncio.gather(
+                    *(
+                        self._worker(client, scraper, state)
+                        for _ in range(self.concurrency)
+                    )
+                )
+        finally:
+            if self._parse_pool is not None:
+                self._parse_pool.shutdown()
+                self._parse_pool = None
+
+    def save_data(self, scraper: "CocktailScraper") -> None:
+        # The sink holds every record already; the CSV is written once, for
+        # the preprocessing step.
+        try:
+            scraper.df.to_csv(f"{self.data_path}/cocktail_data.csv", index=False)
+            logger.info(f"Data saved to {self.data_path}/cocktail_data.csv")
+        except Exception as e:
+            logger.error(f"Failed to save data: {e}")
+
+    def crawl(self, scraper: "CocktailScraper") -> None:
+        if self.resuming:
+            self.load_checkpoint()
+        try:
+            asyncio.run(self.crawl_async(scraper))
         except KeyboardInterrupt:
             logger.warning("Process interrupted. Saving data...")
-            try:
-                scraper.df.to_csv(f"{self.data_path}/cocktail_data.csv", index=False)
-                logger.info(f"Data saved to {self.data_path}/cocktail_data.csv")
-            except Exception as e:
-                logger.error(f"Failed to save data after interruption: {e}")
         except Exception as e:
             logger.error(f"An error occurred: {e}")
-            try:
-                scraper.df.to_csv(f"{self.data_path}/cocktail_data.csv", index=False)
-                logger.info(f"Data saved to {self.data_path}/cocktail_data.csv")
-            except Exception as save_error:
-                logger.error(f"Failed to save data after error: {save_error}")
+        finally:
+            self.save_checkpoint(scraper)
+            self.save_data(scraper)
 
 
 if __name__ == "__main__":
+    from cocktail_scraper import CocktailScraper, JsonlSink
+
+    Logger.setup_log(log_level=logging.INFO, local_dir="./logs")
+
     base_url = ""
     start_url = ""
     crawler = Crawler(base_url, start_url)
-    crawler.crawl()
+    crawler.crawl(
+        CocktailScraper(JsonlSink(f"{crawler.data_path}/cocktail_data.jsonl"))
+    )
@@ -1,53 +1,40 @@
+import argparse
 import logging
-import pickle
-import time
+import os
 
 import nltk
 import pandas as pd
-from cocktail_scraper import CocktailScraper
+from cocktail_scraper import CocktailScraper, JsonlSink
 from crawl import Crawler
-from googletrans import Translator
+from lemmatize import TokenLemmatizer, build_whole_text
 from logs.logger import Logger
-from nltk.stem import WordNetLemmatizer
 from sklearn.feature_extraction.text import TfidfVectorizer
+from translation import CachedTranslator, GoogletransBackend, TranslationCache
+from utils.tfidf_store import save_tfidf
 
-Logger.setup_log(log_level=logging.INFO, local_dir="./logs")
 logger = logging.getLogger(__name__)
 
 
 class TextProcessor:
-    def __init__(self):
+    def __init__(self, backend=None, cache_path="data/translations.sqlite"):
         logger.info("Downloading nltk and translator extensions")
         nltk.download("wordnet")
         nltk.download("omw-1.4")
-        self.lemmatizer = WordNetLemmatizer()
-        self.translator = Translator()
+        self.lemmatizer = TokenLemmatizer(n_jobs=os.cpu_count())
+        # The cache lives outside the per-crawl directories, so a text is
+        # translated once across every crawl and preprocessing run.
+        self.translator = CachedTranslator(
+            backend or GoogletransBackend(), TranslationCache(cache_path)
+        )
 
     def translate_text(self, text):
-        logger.info(text)
-        try:
-            translated_text = self.translator.translate(text, src="pt", dest="en").text
-            logger.info(translated_text)
-            logger.debug(f"Translated text: {text} -> {translated_text}")
-            return translated_text
-        except Exception as e:
-            logger.error(f"Translation error: {e}")
-            return text
-
-    def translate_batch(self, df, batch_size=10, sleep_time=3):
-        translated_texts = []
-        for start in range(0, len(df), batch_size):
-            batch = df.iloc[start : start + batch_size]
-            translated_batch = batch["how_to"].apply(self.translate_text)
-            translated_texts.extend(translated_batch)
-            logger.info(f"Translated batch {start} to {start + batch_size}")
-            time.sleep(sleep_time)
-        return translated_texts
+        return self.translator.translate([text])[0]
+
+    def translate_batch(self, df):
+        return self.translator.translate(df["how_to"].tolist())
 
     def lemmatize_text(self, text):
-        lemmatized_text = self.lemmatizer.lemmatize(text)
-        logger.debug(f"Lemmatized text: {text} -> {lemmatized_text}")
-        return lemmatized_text
+        return self.lemmatizer.lemmatize_texts([text])[0]
 
     def process_data(self, data_path):
         try:
@@ -59,11 +46,8 @@ class TextProcessor:
 
         df["how_to_translated"] = self.translate_batch(df)
 
-        df["whole_text"] = df.apply(
-            lambda row: f"{row.garnish} {row.how_to_translated} {row.comment} {row.history}",
-            axis=1,
-        )
-        df["whole_text"] = df["whole_text"].apply(self.lemmatize_text)
+        df["whole_text"] = self.lemmatizer.lemmatize_texts(build_whole_text(df))
+        logger.info(f"Lemmatized {len(self.lemmatizer.memo)} distinct words")
 
         try:
             output_path = f"{data_path}/cocktail_data_silver.csv"
@@ -86,20 +70,24 @@ class ModelTrainer:
             tfidf_matrix = self.vectorizer.fit_transform(text)
             logger.info("TF-IDF matrix created successfully")
 
-            with open(f"{model_path}/vectorizer.pk", "wb") as f:
-                pickle.dump(self.vectorizer, f)
-            with open(f"{model_path}/tfidf_matrix.pk", "wb") as f:
-                pickle.dump(tfidf_matrix, f)
+            save_tfidf(f"{model_path}/tfidf", self.vectorizer, tfidf_matrix)
+            logger.info(f"TF-IDF artifacts saved to {model_path}/tfidf")
         except Exception as e:
             logger.error(f"Model training failed: {e}")
 
         return self.vectorizer, tfidf_matrix
 
 
-def main(base_url, start_url):
+def main(base_url, start_url, resume_path=None, parse_workers=1):
     logger.info("Starting scraping")
-    scraper = CocktailScraper()
-    crawler = Crawler(base_url, start_url, crawl_limit=10000)
+    crawler = Crawler(
+        base_url,
+        start_url,
+        crawl_limit=10000,
+        data_path=resume_path,
+        parse_workers=parse_workers,
+    )
+    scraper = CocktailScraper(JsonlSink(f"{crawler.data_path}/cocktail_data.jsonl"))
 
     try:
         crawler.crawl(scraper)
@@ -107,6 +95,8 @@ def main(base_url, start_url):
     except Exception as e:
         logger.error(f"Crawling failed: {e}")
         return
+    finally:
+        scraper.sink.close()
 
     text_processor = TextProcessor()
     text = text_processor.process_data(crawler.data_path)
@@ -121,7 +111,24 @@ def main(base_url, start_url):
 
 
 if __name__ == "__main__":
+    Logger.setup_log(log_level=logging.INFO, local_dir="./logs")
+    parser = argparse.ArgumentParser(description="Crawl, preprocess and train")
+    parser.add_argument(
+        "--resume",
+        metavar="DATA_PATH",
+        help="data directory of an interrupted crawl to continue",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=1,
+        help="processes parsing fetched pages; 1 parses on the event loop",
+    )
+    args = parser.parse_args()
+
     main(
         "https://www.diffordsguide.com",
         "/pt-br/cocktails/recipe/2167/frank-sullivan-cocktail",
+        resume_path=args.resume,
+        parse_workers=args.parse_workers,
     )
@@ -0,0 +1,69 @@
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import Callable, List
+
+import pandas as pd
+
+WORD = re.compile(r"\w+")
+TEXT_COLUMNS = ["garnish", "how_to_translated", "comment", "history"]
+PARALLEL_MIN_TOKENS = 50000
+
+_wordnet = None
+
+
+def wordnet_lemmatize(token: str) -> str:
+    global _wordnet
+    if _wordnet is None:
+        from nltk.stem import WordNetLemmatizer
+
+        _wordnet = WordNetLemmatizer()
+    return _wordnet.lemmatize(token)
+
+
+def _lemmatize_chunk(tokens, lemmatize):
+    return [lemmatize(token) for token in tokens]
+
+
+def build_whole_text(df: pd.DataFrame, columns=TEXT_COLUMNS) -> pd.Series:
+    first, *rest = (df[column].astype(str) for column in columns)
+    return first.str.cat(rest, sep=" ")
+
+
+class TokenLemmatizer:
+    """Lemmatizes texts word by word, each distinct word only once.
+
+    Texts are lowercased and split into \\w+ words, the same words the TF-IDF
+    vectorizer and the GloVe tokenizer see. Lemmas are kept in memo across
+    calls; new words are lemmatized in chunks on n_jobs processes when there
+    are at least PARALLEL_MIN_TOKENS of them.
+    """
+
+    def __init__(
+        self,
+        lemmatize: Callable[[str], str] = wordnet_lemmatize,
+        n_jobs: int = 1,
+        chunk_size: int = 4096,
+    ):
+        self.lemmatize = lemmatize
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self.memo = {}
+
+    def _lemmatize_new(self, tokens):
+        if self.n_jobs == 1 or len(tokens) < PARALLEL_MIN_TOKENS:
+            return _lemmatize_chunk(tokens, self.lemmatize)
+        chunks = [
+            tokens[i : i + self.chunk_size]
+            for i in range(0, len(tokens), self.chunk_size)
+        ]
+        with ProcessPoolExecutor(max_workers=self.n_jobs) as pool:
+            results = pool.map(_lemmatize_chunk, chunks, [self.lemmatize] * len(chunks))
+            return list(chain.from_iterable(results))
+
+    def lemmatize_texts(self, texts) -> List[str]:
+        tokens = pd.Series(texts, dtype=object).str.lower().str.findall(WORD)
+        new = list(set(chain.from_iterable(tokens)).difference(self.memo))
+        self.memo.update(zip(new, self._lemmatize_new(new)))
+        lemma = self.memo.__getitem__
+        return [" ".join(map(lemma, words)) for words in tokens]
@@ -0,0 +1,152 @@
+import hashlib
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class StubBackend:
+    """Offline backend for tests: looks texts up in a dict, else tags them."""
+
+    def __init__(self, translations: Dict[str, str] = None):
+        self.translations = translations or {}
+        self.calls = []
+
+    def translate(self, texts: List[str], src: str, dest: str) -> List[str]:
+        self.calls.append(list(texts))
+        return [self.translations.get(text, f"[{dest}] {text}") for text in texts]
+
+
+class GoogletransBackend:
+    """googletrans, one request per text, at most one every min_interval seconds.
+
+    googletrans 4.0.0-rc1 cannot translate a list, and its endpoint is
+    unofficial, so requests are spaced out. A text that fails comes back as
+    None and the others in the batch are kept.
+    """
+
+    def __init__(self, min_interval: float = 1.0, clock=time.monotonic, sleep=None):
+        from googletrans import Translator
+
+        self.translator = Translator()
+        self.min_interval = min_interval
+        self.clock = clock
+        self.sleep = sleep or time.sleep
+        self._next_request = 0.0
+
+    def _throttle(self):
+        wait = self._next_request - self.clock()
+        if wait > 0:
+            self.sleep(wait)
+        self._next_request = self.clock() + self.min_interval
+
+    def translate(self, texts: List[str], src: str, dest: str) -> List[str]:
+        results = []
+        for text in texts:
+            self._throttle()
+            try:
+                results.append(self.translator.translate(text, src=src, dest=dest).text)
+            except Exception as e:
+                logger.error(f"Translation error: {e}")
+                logger.debug(f"Failed to translate: {text}")
+                results.append(None)
+        return results
+
+
+class TranslationCache:
+    """Translations in SQLite, keyed by a hash of the language pair and text."""
+
+    def __init__(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(path))
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS translations "
+            "(key TEXT PRIMARY KEY, src TEXT, dest TEXT, translated TEXT)"
+        )
+
+    @staticmethod
+    def key(text: str, src: str, dest: str) -> str:
+        return hashlib.sha256(f"{src}\0{dest}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: List[str], src: str, dest: str) -> Dict[str, str]:
+        keys = {self.key(text, src, dest): text for text in texts}
+        found = {}
+        items = list(keys)
+        # Stay under SQLite's bound parameter limit.
+        for start in range(0, len(items), 500):
+            chunk = items[start : start + 500]
+            rows = self.connection.execute(
+                "SELECT key, translated FROM translations WHERE key IN "
+                f"({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for key, translated in rows:
+                found[keys[key]] = translated
+        return found
+
+    def put_many(self, translations: Dict[str, str], src: str, dest: str) -> None:
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)",
+                [
+                    (self.key(text, src, dest), src, dest, translated)
+                    for text, translated in translations.items()
+                ],
+            )
+
+    def __len__(self):
+        (count,) = self.connection.execute("SELECT COUNT(*) FROM translations")
+        return count[0]
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class CachedTranslator:
+    """Translates a list of texts, sending only unseen distinct ones.
+
+    Texts the backend fails on (an exception for the batch, or None for one
+    text) fall back to the source text and are not cached, so the next run
+    retries them.
+    """
+
+    def __init__(
+        self, backend, cache: TranslationCache, src="pt", dest="en", batch_size=50
+    ):
+        self.backend = backend
+        self.cache = cache
+        self.src = src
+        self.dest = dest
+        self.batch_size = batch_size
+
+    def translate(self, texts: List[str]) -> List[str]:
+        unique = list(dict.fromkeys(texts))
+        translated = self.cache.get_many(unique, self.src, self.dest)
+        missing = [text for text in unique if text not in translated]
+        logger.info(
+            f"Translating {len(texts)} texts: {len(unique)} distinct, "
+            f"{len(missing)} not cached"
+        )
+
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start : start + self.batch_size]
+            try:
+                results = self.backend.translate(batch, self.src, self.dest)
+            except Exception as e:
+                logger.error(f"Translation error for batch at {start}: {e}")
+                continue
+            batch_translations = {
+                text: result
+                for text, result in zip(batch, results)
+                if result is not None
+            }
+            for text, result in batch_translations.items():
+                logger.debug(f"Translated text: {text} -> {result}")
+            self.cache.put_many(batch_translations, self.src, self.dest)
+            translated.update(batch_translations)
+            logger.info(f"Translated {start + len(batch)} of {len(missing)}")
+
+        return [translated.get(text, text) for text in texts]
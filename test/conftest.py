@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+from utils.artifacts import ArtifactBundle
+from utils.autoencoder import Autoencoder
+from utils.pooling import masked_mean_pool
+from utils.tokenizer import MyTokenizer
+
+DOCUMENTS = [
+    "lime wedge shake gin with lime juice and sugar",
+    "orange zest stir whiskey with bitters and sugar",
+    "mint sprig muddle mint with rum and lime",
+    "cherry stir bourbon with vermouth and bitters",
+    "salt rim shake tequila with lime and triple sec",
+    "pineapple wedge blend rum with coconut cream",
+]
+
+
+@pytest.fixture
+def cocktail_df():
+    return pd.DataFrame(
+        {
+            "drink_title": [f"drink-{i}" for i in range(len(DOCUMENTS))],
+            "drink_glass": "Coupe",
+            "garnish": "",
+            "comment": "",
+            "history": "",
+            "how_to_translated": DOCUMENTS,
+            "whole_text": DOCUMENTS,
+        }
+    )
+
+
+@pytest.fixture
+def artifact_dir(tmp_path, cocktail_df):
+    torch.manual_seed(0)
+    rng = np.random.default_rng(0)
+
+    tokenizer = MyTokenizer(sentence_length=12, case_sensitive=False)
+    tokenizer.fit(cocktail_df.whole_text)
+    embedding_matrix = rng.standard_normal((tokenizer.vocab_size, 300)).astype(
+        np.float32
+    )
+    embedding_matrix[tokenizer.vocab["<PAD>"]] = 0
+    model = Autoencoder(300, 200, 100)
+    model.eval()
+
+    pooled = masked_mean_pool(tokenizer.encode_batch(DOCUMENTS), embedding_matrix)
+    with torch.no_grad():
+        embeddings = model.encoder(torch.from_numpy(pooled)).numpy()
+
+    ArtifactBundle(tokenizer, embedding_matrix, model, embeddings).save(tmp_path)
+    cocktail_df.to_csv(tmp_path / "cocktail_data.csv", index=False)
+    return tmp_path
@@ -0,0 +1,42 @@
+import numpy as np
+
+from app.glove_recommender import GloVeRecommender
+from test.conftest import DOCUMENTS
+from utils.artifacts import ArtifactBundle
+from utils.train_embedding import embed_corpus, get_enhanced_embeddings
+
+
+def test_query_vectors_match_training_embeddings(artifact_dir):
+    bundle = ArtifactBundle.load(artifact_dir)
+    recommender = GloVeRecommender.from_files(
+        artifact_dir / "cocktail_data.csv", artifact_dir
+    )
+
+    assert isinstance(recommender.embeddings, np.memmap)
+    for i, text in enumerate(DOCUMENTS):
+        np.testing.assert_allclose(
+            recommender._get_query_vector(text)[0], bundle.embeddings[i], atol=1e-6
+        )
+
+
+def test_embed_corpus_matches_bundle_embeddings(artifact_dir):
+    bundle = ArtifactBundle.load(artifact_dir)
+    out_path = artifact_dir / "embeddings_out.npy"
+
+    embeddings = embed_corpus(
+        DOCUMENTS,
+        bundle.tokenizer,
+        bundle.embedding_matrix,
+        model=bundle.model,
+        chunk_size=4,
+        out=out_path,
+    )
+    np.testing.assert_allclose(embeddings, bundle.embeddings, atol=1e-6)
+    np.testing.assert_allclose(np.load(out_path), bundle.embeddings, atol=1e-6)
+
+    pooled = embed_corpus(DOCUMENTS, bundle.tokenizer, bundle.embedding_matrix)
+    np.testing.assert_allclose(
+        get_enhanced_embeddings(bundle.model, pooled, batch_size=4),
+        bundle.embeddings,
+        atol=1e-6,
+    )
@@ -0,0 +1,61 @@
+import asyncio
+
+from app.batcher import MicroBatcher
+
+
+def test_concurrent_submissions_share_a_batch():
+    calls = []
+
+    def double(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, max_batch_size=4, max_wait_ms=20)
+
+    async def scenario():
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(6)))
+        await batcher.close()
+        return results
+
+    assert asyncio.run(scenario()) == [0, 2, 4, 6, 8, 10]
+    assert [len(batch) for batch in calls] == [4, 2]
+    assert batcher.stats()["batch_size_histogram"] == {2: 1, 4: 1}
+
+
+def test_errors_are_propagated_to_every_waiter():
+    def fail(items):
+        raise ValueError("boom")
+
+    batcher = MicroBatcher(fail, max_batch_size=8, max_wait_ms=5)
+
+    async def scenario():
+        return await asyncio.gather(
+            batcher.submit(1), batcher.submit(2), return_exceptions=True
+        )
+
+    assert all(isinstance(result, ValueError) for result in asyncio.run(scenario()))
+
+
+def test_close_waits_for_batches_in_flight():
+    release = None
+
+    async def run(fn, items):
+        await release.wait()
+        return fn(items)
+
+    batcher = MicroBatcher(lambda items: items, max_wait_ms=1, run=run)
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        pending = asyncio.ensure_future(batcher.submit("a"))
+        while not batcher._tasks:
+            await asyncio.sleep(0.001)
+        closing = asyncio.ensure_future(batcher.close())
+        await asyncio.sleep(0.01)
+        assert not closing.done()
+        release.set()
+        await closing
+        return await pending, batcher._tasks
+
+    assert asyncio.run(scenario()) == ("a", set())
@@ -0,0 +1,43 @@
+from benchmarks.bench_recommenders import compare, measure
+from benchmarks.synthetic import make_queries, write_corpus
+
+
+def test_recommenders_run_on_synthetic_corpus(tmp_path):
+    write_corpus(tmp_path, 200, vocab_size=500, words_per_doc=12, dim=300)
+    for kind in ("glove", "tfidf"):
+        result = measure(kind, tmp_path, n_queries=20, batch_size=8)
+        assert result["load_seconds"] > 0 and result["peak_rss_mb"] > 0
+        assert result["latency_ms"]["p50"] <= result["latency_ms"]["p99"]
+        assert result["batch_queries_per_second"] > 0
+
+
+def test_queries_are_distinct():
+    queries = make_queries(100)
+    assert len(set(queries)) == 100
+
+
+def test_compare_skips_missing_metrics_and_covers_http(capsys):
+    run = {
+        "n_docs": 1000,
+        "recommender": "glove",
+        "load_seconds": 2.0,
+        "peak_rss_mb": None,
+        "batch_queries_per_second": 100.0,
+        "latency_ms": {"p50": 1.0, "p99": 4.0},
+    }
+    http = {
+        "n_docs": 1000,
+        "requests_per_second": 500.0,
+        "peak_rss_mb": 0,
+        "latency_ms": {"p50": 2.0, "p99": 8.0},
+    }
+    faster = {**run, "load_seconds": 1.0, "peak_rss_mb": 50.0}
+    compare(
+        {"results": [run], "http": [http]},
+        {"results": [faster], "http": [{**http, "requests_per_second": 1000.0}]},
+    )
+
+    glove, query = capsys.readouterr().out.splitlines()
+    assert "load_seconds x0.50" in glove and "peak_rss_mb" not in glove
+    assert query.startswith("/query") and "requests_per_second x2.00" in query
+    assert "peak_rss_mb" not in query
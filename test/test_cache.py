@@ -0,0 +1,29 @@
+from app.cache import LRUCache, normalize_query
+
+
+def test_lru_eviction_and_counters():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (3, 1, 1)
+
+
+def test_ttl_expiry():
+    now = [0.0]
+    cache = LRUCache(maxsize=4, ttl=10, clock=lambda: now[0])
+    cache.put("a", 1)
+    now[0] = 9.9
+    assert cache.get("a") == 1
+    now[0] = 10.0
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1 and len(cache) == 0
+
+
+def test_normalize_query():
+    assert normalize_query("  Smoky   Whiskey\tDrink ") == "smoky whiskey drink"
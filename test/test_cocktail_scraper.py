@@ -0,0 +1,58 @@
+import re
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("bs4")
+
+from scripts.cocktail_scraper import (  # noqa: E402
+    FIELDS,
+    PARSERS,
+    extract_cocktail_info,
+    parse_page,
+)
+
+FIXTURES = sorted((Path(__file__).parent / "fixtures" / "html").glob("*.html"))
+
+
+def regex_extract(text):
+    # The per-field regexes extract_cocktail_info replaced.
+    text = re.sub(r"\s+", " ", text)
+    extracted_info = {}
+    for key, start, end in FIELDS:
+        match = re.search(
+            re.escape(start.strip()) + " (.*?) " + re.escape(end.strip()), text
+        )
+        extracted_info[key] = match.group(1).strip() if match else None
+    return extracted_info
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Servir em  Coupe\n Fotografado Decoração: Lime Como fazer: Shake. Loading... "
+        "Comentários: Nice. História: Old. Nutrition: 180 cal "
+        "Alcohol content: 1.2 grams of pure alcohol",
+        "Como fazer: Stir. Loading... Nutrition: 90 cal Decoração: none",
+        "",
+    ],
+)
+def test_extract_matches_regexes(text):
+    assert extract_cocktail_info(text) == regex_extract(text)
+
+
+@pytest.mark.parametrize("parser", sorted(PARSERS))
+def test_backends_agree_on_fixtures(parser):
+    if parser != "html.parser":
+        pytest.importorskip(parser)
+    for path in FIXTURES:
+        html = path.read_text(encoding="utf-8")
+        url = f"/recipe/{path.stem}"
+        record, previous, nxt = parse_page(html, url, parser)
+        assert (record, previous, nxt) == parse_page(html, url, "html.parser")
+        assert record["how_to"] and previous.startswith("/")
+
+
+def test_parse_page_without_article():
+    record, previous, nxt = parse_page("<html><body></body></html>", "/recipe/x")
+    assert record is None and (previous, nxt) == ("", "")
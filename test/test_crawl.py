@@ -0,0 +1,194 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("bs4")
+
+from scripts.cocktail_scraper import CocktailScraper, JsonlSink  # noqa: E402
+from scripts.crawl import Crawler, TokenBucket  # noqa: E402
+
+LINKS = {
+    "/recipe/0": ("/recipe/missing", "/recipe/1"),
+    "/recipe/1": ("/recipe/0", "/recipe/2"),
+    "/recipe/2": ("/recipe/1", "/recipe/3"),
+    "/recipe/3": ("/recipe/2", "/private/4"),
+}
+
+
+def recipe_page(path):
+    previous, nxt = LINKS[path]
+    name = path.split("/")[-1]
+    return f"""<html><body>
+<article class="cell long-form long-form--small long-form--inline-paragraph pad-bottom">
+Servir em Coupe {name} Fotografado
+Decoração: Lime {name} Como fazer: Shake {name} with ice. Loading...
+Comentários: Tasty. História: Old {name}. Nutrition: 180 cal
+Alcohol content: 1.{name} grams of pure alcohol
+</article>
+<a class="cell small-6 colour-inherit opacity-hover" href="{previous}">prev</a>
+<a class="cell small-6 colour-inherit opacity-hover" href="{nxt}">next</a>
+</body></html>"""
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    requests = []
+    failures = {"/recipe/3": 1}
+
+    def do_GET(self):
+        StubHandler.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/robots.txt":
+            return self._send(200, "User-agent: *\nDisallow: /private\n")
+        if self.path.startswith("/moved/"):
+            return self._send(301, "", {"Location": "/recipe/" + self.path[7:]})
+        if StubHandler.failures.get(self.path):
+            StubHandler.failures[self.path] -= 1
+            return self._send(503, "busy", {"Retry-After": "0"})
+        if self.path not in LINKS:
+            return self._send(404, "not found")
+        etag = f'"{self.path}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, "")
+        self._send(200, recipe_page(self.path), {"ETag": etag})
+
+    def _send(self, status, body, headers=None):
+        payload = body.encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def crawl(base_url, tmp_path, scraper=None, start_url="/recipe/1", **kwargs):
+    crawler = Crawler(
+        base_url,
+        start_url,
+        **{"crawl_limit": 10, "concurrency": 4, **kwargs},
+        requests_per_second=1000,
+        backoff=0.01,
+        data_dir=str(tmp_path / "data"),
+        model_dir=str(tmp_path / "model"),
+    )
+    if scraper is None:
+        scraper = CocktailScraper()
+    crawler.crawl(scraper)
+    return scraper
+
+
+def test_crawl_retries_honours_robots_and_revalidates(stub_server, tmp_path):
+    scraper = crawl(stub_server, tmp_path)
+    assert sorted(scraper.df.drink_title) == ["0", "1", "2", "3"]
+    assert scraper.df.set_index("drink_title").loc["3", "how_to"] == "Shake 3 with ice."
+    paths = [path for path, _ in StubHandler.requests]
+    assert paths.count("/recipe/3") == 2
+    assert "/private/4" not in paths
+
+    # A re-crawl sends the stored ETags and rebuilds the records from 304s.
+    StubHandler.requests.clear()
+    again = crawl(stub_server, tmp_path)
+    assert sorted(again.df.drink_title) == ["0", "1", "2", "3"]
+    assert all(
+        etag == f'"{path}"' for path, etag in StubHandler.requests if path in LINKS
+    )
+
+
+def test_token_bucket_limits_rate():
+    async def acquire_all(bucket, n):
+        for _ in range(n):
+            await bucket.acquire()
+
+    bucket = TokenBucket(rate=50)
+    started = time.monotonic()
+    asyncio.run(acquire_all(bucket, 6))
+    assert time.monotonic() - started >= 0.09
+
+
+def test_interrupted_crawl_resumes_from_checkpoint(stub_server, tmp_path):
+    data_path = tmp_path / "data" / "run"
+    sink_path = data_path / "cocktail_data.jsonl"
+    data_path.mkdir(parents=True)
+
+    scraper = CocktailScraper(JsonlSink(sink_path, fsync_every=1))
+    crawl(
+        stub_server,
+        tmp_path,
+        scraper,
+        crawl_limit=2,
+        concurrency=1,
+        data_path=data_path,
+    )
+    scraper.sink.close()
+    assert len(scraper) == 2
+
+    StubHandler.requests.clear()
+    resumed = CocktailScraper(JsonlSink(sink_path))
+    crawl(stub_server, tmp_path, resumed, data_path=data_path)
+    resumed.sink.close()
+
+    assert sorted(resumed.df.drink_title) == ["0", "1", "2", "3"]
+    assert len(resumed.df) == 4
+    assert "/recipe/1" not in [path for path, _ in StubHandler.requests]
+    assert (data_path / "cocktail_data.csv").exists()
+
+
+def test_jsonl_sink_drops_torn_record(tmp_path):
+    path = tmp_path / "records.jsonl"
+    sink = JsonlSink(path)
+    sink.append({"drink_title": "a"})
+    sink.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"drink_title": "b"')
+
+    sink = JsonlSink(path)
+    assert len(sink) == 1
+    sink.append({"drink_title": "c"})
+    assert [record["drink_title"] for record in sink.records()] == ["a", "c"]
+    sink.close()
+
+
+def test_crawl_parses_in_worker_processes(stub_server, tmp_path):
+    StubHandler.failures["/recipe/3"] = 1
+    scraper = crawl(stub_server, tmp_path, parse_workers=2)
+    assert sorted(scraper.df.drink_title) == ["0", "1", "2", "3"]
+
+
+def test_retry_after_is_capped(tmp_path):
+    crawler = Crawler(
+        "http://example.com",
+        "/",
+        backoff=0.5,
+        max_retries=3,
+        data_dir=str(tmp_path / "data"),
+        model_dir=str(tmp_path / "model"),
+    )
+    response = httpx.Response(503, headers={"Retry-After": "3600"})
+    assert crawler._retry_delay(0, response) == 4.0
+    assert (
+        crawler._retry_delay(0, httpx.Response(503, headers={"Retry-After": "2"})) == 2
+    )
+
+
+def test_crawl_follows_redirects(stub_server, tmp_path):
+    StubHandler.failures["/recipe/3"] = 0
+    scraper = crawl(stub_server, tmp_path, start_url="/moved/1")
+    df = scraper.df.set_index("path")
+    assert df.loc["/moved/1", "how_to"] == "Shake 1 with ice."
+    assert {"/recipe/0", "/recipe/2", "/recipe/3"} <= set(df.index)
@@ -0,0 +1,40 @@
+import numpy as np
+import torch
+
+from app.glove_recommender import GloVeRecommender
+from test.conftest import DOCUMENTS
+from utils.artifacts import ArtifactBundle
+from utils.encoder_export import ENCODER_FILE, encoder_parity, export_encoder
+
+
+def test_exported_encoder_matches_eager(artifact_dir, tmp_path):
+    bundle = ArtifactBundle.load(artifact_dir)
+    inputs = torch.from_numpy(bundle.embedding_matrix.copy())
+
+    scripted = export_encoder(bundle.model, tmp_path / "fp32.pt")
+    assert (
+        encoder_parity(bundle.model.encoder, scripted, inputs)["max_abs_error"] < 1e-5
+    )
+
+    quantized = export_encoder(bundle.model, tmp_path / "int8.pt", quantize=True)
+    assert encoder_parity(bundle.model.encoder, quantized, inputs)["min_cosine"] > 0.99
+
+
+def test_recommender_serves_exported_encoder(artifact_dir):
+    data_path = artifact_dir / "cocktail_data.csv"
+    eager = GloVeRecommender.from_files(data_path, artifact_dir)
+
+    export_encoder(ArtifactBundle.load(artifact_dir).model, artifact_dir / ENCODER_FILE)
+    bundle = ArtifactBundle.load(artifact_dir, serving=True)
+    assert bundle.model is None
+    exported = GloVeRecommender.from_files(data_path, artifact_dir)
+
+    for text in DOCUMENTS:
+        np.testing.assert_allclose(
+            exported._get_query_vector(text),
+            eager._get_query_vector(text),
+            atol=1e-5,
+        )
+        assert [r["drink_title"] for r in exported.recommend(text)] == [
+            r["drink_title"] for r in eager.recommend(text)
+        ]
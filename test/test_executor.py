@@ -0,0 +1,25 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.executor import BoundedExecutor, Saturated
+
+
+def test_rejects_work_beyond_workers_plus_queue():
+    executor = BoundedExecutor(max_workers=1, max_queue=1, compute_threads=None)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait))
+        queued = asyncio.ensure_future(executor.run(lambda: "queued"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(Saturated):
+            await executor.run(lambda: "rejected")
+        release.set()
+        return await asyncio.gather(running, queued)
+
+    assert asyncio.run(scenario()) == [True, "queued"]
+    stats = executor.stats()
+    assert stats["rejected"] == 1 and stats["in_flight"] == 0
+    executor.shutdown()
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from utils.glove import Glove
+
+
+def test_binary_store_matches_text_vectors(tmp_path):
+    glove_file = tmp_path / "glove.txt"
+    glove_file.write_text("the 0.1 0.2 0.3\ndrink -1.5 2.0 0.25\n", encoding="utf-8")
+
+    text_vectors = Glove._load_glove_vectors(glove_file)
+    Glove.convert_to_binary(glove_file, tmp_path / "bin")
+    binary_vectors = Glove.load_vectors(tmp_path / "bin")
+
+    assert isinstance(binary_vectors.vectors, np.memmap)
+    assert len(binary_vectors) == 2
+    assert "drink" in binary_vectors and "gin" not in binary_vectors
+    for word, vector in text_vectors.items():
+        np.testing.assert_allclose(binary_vectors[word], vector.numpy())
+
+
+def test_load_vectors_falls_back_to_text_file(tmp_path):
+    (tmp_path / "glove.txt").write_text("the 0.1 0.2 0.3\n", encoding="utf-8")
+    assert "the" in Glove.load_vectors(tmp_path / "glove")
+
+    with pytest.raises(FileNotFoundError, match="make glove-binary"):
+        Glove.load_vectors(tmp_path / "missing")
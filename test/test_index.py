@@ -0,0 +1,88 @@
+import numpy as np
+
+from app.glove_recommender import GloVeRecommender
+from utils.artifacts import ArtifactBundle
+from utils.index import (
+    BruteForceIndex,
+    IVFIndex,
+    QuantizedIndex,
+    load_index,
+    recall_at_k,
+)
+
+
+def clustered_embeddings(n=2000, dim=50, n_clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim)) * 3
+    labels = rng.integers(n_clusters, size=n)
+    return (centers[labels] + rng.standard_normal((n, dim))).astype(np.float32)
+
+
+def test_ivf_recall_against_exact_search():
+    embeddings = clustered_embeddings()
+    queries = embeddings[:100] + 0.1
+    index = IVFIndex(n_lists=32, n_probe=4).build(embeddings)
+
+    assert recall_at_k(index, queries, k=10) > 0.8
+    index.n_probe = index.n_lists
+    assert recall_at_k(index, queries, k=10) == 1.0
+
+
+def test_ivf_save_and_load_round_trip(tmp_path):
+    embeddings = clustered_embeddings(n=500)
+    index = IVFIndex(n_lists=16, n_probe=3).build(embeddings)
+    index.save(tmp_path)
+
+    loaded = load_index(tmp_path, embeddings)
+    assert isinstance(loaded, IVFIndex)
+    for (expected, _), (found, _) in zip(
+        index.search(embeddings[:20], 5), loaded.search(embeddings[:20], 5)
+    ):
+        np.testing.assert_array_equal(expected, found)
+
+
+def test_recommender_uses_index_from_bundle(artifact_dir):
+    bundle = ArtifactBundle.load(artifact_dir)
+    assert bundle.index is None
+    bundle.index = IVFIndex(n_lists=2, n_probe=2).build(bundle.embeddings)
+    bundle.save_index(artifact_dir)
+
+    recommender = GloVeRecommender.from_files(
+        artifact_dir / "cocktail_data.csv", artifact_dir, threshold=-np.inf
+    )
+    assert isinstance(recommender.index, IVFIndex)
+    exact = BruteForceIndex(recommender.embeddings)
+    query_vec = recommender._get_query_vector("gin with lime")
+    np.testing.assert_array_equal(
+        recommender.index.search(query_vec, 3)[0][0], exact.search(query_vec, 3)[0][0]
+    )
+
+
+def test_quantized_index_recall_and_round_trip(tmp_path):
+    embeddings = clustered_embeddings()
+    queries = embeddings[:100] + 0.1
+
+    for codec, params in [("float16", {}), ("int8", {}), ("pq", {"n_subspaces": 10})]:
+        index = QuantizedIndex(codec=codec, rescore=4, **params).build(embeddings)
+        assert index.codec.nbytes < embeddings.nbytes
+        assert recall_at_k(index, queries, k=10) > 0.95
+
+        index.save(tmp_path / codec)
+        loaded = load_index(tmp_path / codec, embeddings)
+        assert isinstance(loaded, QuantizedIndex)
+        for (expected, _), (found, _) in zip(
+            index.search(queries[:20], 5), loaded.search(queries[:20], 5)
+        ):
+            np.testing.assert_array_equal(expected, found)
+
+
+def test_ivf_lists_are_spherical_kmeans_clusters():
+    embeddings = clustered_embeddings(n=500)
+    index = IVFIndex(n_lists=8).build(embeddings, n_iter=50)
+
+    np.testing.assert_allclose(np.linalg.norm(index.centroids, axis=1), 1, rtol=1e-5)
+    # Each centroid is the mean direction of the documents listed under it.
+    for i, centroid in enumerate(index.centroids):
+        members = index.list_order[index.list_offsets[i] : index.list_offsets[i + 1]]
+        mean = embeddings[members].mean(axis=0)
+        np.testing.assert_allclose(centroid, mean / np.linalg.norm(mean), atol=1e-5)
@@ -0,0 +1,29 @@
+import numpy as np
+from scipy import sparse
+
+from utils.inverted_index import InvertedIndex
+from utils.ranking import top_n
+
+
+def test_search_matches_exhaustive_scoring():
+    rng = np.random.default_rng(0)
+    tfidf_matrix = sparse.random(
+        3000, 500, density=0.02, format="csr", random_state=0, dtype=np.float64
+    )
+    index = InvertedIndex.from_matrix(tfidf_matrix)
+
+    for _ in range(20):
+        query = sparse.random(1, 500, density=0.01, format="csr", random_state=rng)
+        exact_scores = (query @ tfidf_matrix.T).toarray()[0]
+        for threshold in (None, 0.05):
+            expected, expected_scores = top_n(exact_scores, 10, threshold)
+            for prune in (False, True):
+                found, found_scores = index.search(query, 10, threshold, prune=prune)
+                np.testing.assert_allclose(found_scores, expected_scores)
+                assert set(found) == set(expected)
+
+
+def test_search_with_no_known_terms():
+    index = InvertedIndex.from_matrix(sparse.eye(4, format="csr"))
+    found, scores = index.search(sparse.csr_matrix((1, 4)), 3)
+    assert len(found) == 0 and len(scores) == 0
@@ -0,0 +1,53 @@
+import pandas as pd
+
+from scripts import lemmatize
+from scripts.lemmatize import TokenLemmatizer, build_whole_text
+
+LEMMAS = {"limes": "lime", "cherries": "cherry", "glasses": "glass"}
+
+
+def strip_plural(token):
+    return LEMMAS.get(token, token)
+
+
+def test_build_whole_text_matches_row_format():
+    df = pd.DataFrame(
+        {
+            "garnish": ["Lime", "nan"],
+            "how_to_translated": ["Shake.", "Stir."],
+            "comment": ["Tart", "Dry"],
+            "history": ["Old", "New"],
+        }
+    )
+    expected = df.apply(
+        lambda row: f"{row.garnish} {row.how_to_translated} {row.comment} {row.history}",
+        axis=1,
+    )
+    assert build_whole_text(df).tolist() == expected.tolist()
+
+
+def test_lemmatizes_each_distinct_word_once():
+    calls = []
+
+    def counting(token):
+        calls.append(token)
+        return strip_plural(token)
+
+    lemmatizer = TokenLemmatizer(counting)
+    texts = ["Two Limes, two cherries.", "Limes in glasses"]
+    assert lemmatizer.lemmatize_texts(texts) == [
+        "two lime two cherry",
+        "lime in glass",
+    ]
+    assert sorted(calls) == ["cherries", "glasses", "in", "limes", "two"]
+
+    assert lemmatizer.lemmatize_texts(["limes"]) == ["lime"]
+    assert len(calls) == 5
+
+
+def test_parallel_matches_serial(monkeypatch):
+    monkeypatch.setattr(lemmatize, "PARALLEL_MIN_TOKENS", 1)
+    texts = [f"limes w{i} cherries" for i in range(50)]
+    parallel = TokenLemmatizer(strip_plural, n_jobs=2, chunk_size=8)
+    serial = TokenLemmatizer(strip_plural)
+    assert parallel.lemmatize_texts(texts) == serial.lemmatize_texts(texts)
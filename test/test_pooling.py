@@ -0,0 +1,18 @@
+import numpy as np
+
+from utils.pooling import masked_mean_pool, ragged_mean_pool
+
+
+def test_padding_is_ignored_and_empty_rows_are_zero():
+    rng = np.random.default_rng(0)
+    embedding_matrix = rng.standard_normal((20, 6)).astype(np.float32)
+    token_ids = np.array([[0, 0, 3, 4], [0, 0, 0, 0], [5, 5, 5, 1]], dtype=np.int32)
+
+    pooled = masked_mean_pool(token_ids, embedding_matrix, pad_id=0)
+    assert pooled.dtype == np.float32
+    np.testing.assert_allclose(pooled[0], embedding_matrix[[3, 4]].mean(axis=0))
+    np.testing.assert_array_equal(pooled[1], np.zeros(6))
+    np.testing.assert_allclose(pooled[2], embedding_matrix[[5, 5, 5, 1]].mean(axis=0))
+
+    ragged = ragged_mean_pool(np.array([3, 4, 5, 5, 5, 1]), [2, 0, 4], embedding_matrix)
+    np.testing.assert_allclose(ragged, pooled)
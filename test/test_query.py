@@ -1,9 +1,16 @@
+import pytest
 from fastapi.testclient import TestClient
 from app.main import app
 
-client = TestClient(app)
 
-def test_query_yields_10_results():
+@pytest.fixture(scope="module")
+def client():
+    # Entering the client runs the lifespan, which loads the active model.
+    with TestClient(app) as client:
+        yield client
+
+
+def test_query_yields_10_results(client):
     response = client.get("/query?query=A dark drink for the halloween")
     json_response = response.json()
     
@@ -11,7 +18,7 @@ def test_query_yields_10_results():
     assert len(json_response["results"]) == 10
     assert json_response["message"] == "OK"
 
-def test_query_yields_few_results():
+def test_query_yields_few_results(client):
     response = client.get("/query?query=I'd like a drink with that reminds me some smoky notes due the heavy weather of today")
     json_response = response.json()
     
@@ -19,7 +26,7 @@ def test_query_yields_few_results():
     assert 1 < len(json_response["results"]) < 10
     assert json_response["message"] == "OK"
 
-def test_query_yields_non_obvious_results():
+def test_query_yields_non_obvious_results(client):
     response = client.get("/query?query=Perfect drink pairings for a burger")
     json_response = response.json()
     """The non-obvious result is due to the fact
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from utils.ranking import RESULT_COLUMNS, to_records, top_n
+
+
+def reference_top_n(scores, n, threshold):
+    return [i for i in scores.argsort()[::-1] if scores[i] > threshold][:n]
+
+
+def test_top_n_matches_full_sort():
+    rng = np.random.default_rng(0)
+    scores = rng.standard_normal(1000)
+    for n, threshold in [(10, 0.5), (5, -np.inf), (50, 2.5), (0, 0.0), (2000, 1.0)]:
+        indices, top_scores = top_n(scores, n, threshold)
+        assert list(indices) == reference_top_n(scores, n, threshold)
+        np.testing.assert_array_equal(top_scores, scores[indices])
+
+
+def test_top_n_without_threshold_or_candidates():
+    scores = np.array([0.1, 0.9, 0.5])
+    assert list(top_n(scores, 2)[0]) == [1, 2]
+    assert len(top_n(scores, 3, threshold=1.0)[0]) == 0
+
+
+def test_to_records_adds_relevance_and_blanks_missing_fields():
+    df = pd.DataFrame({column: ["a", None] for column in RESULT_COLUMNS})
+    df["whole_text"] = "not returned"
+
+    records = to_records(df, np.array([1, 0]), np.array([0.75, 0.5], np.float32))
+    assert [record["relevance"] for record in records] == [0.75, 0.5]
+    assert records[0]["garnish"] == "" and records[1]["garnish"] == "a"
+    assert set(records[0]) == {*RESULT_COLUMNS, "relevance"}
+    assert to_records(df, np.array([], np.intp), np.array([])) == []
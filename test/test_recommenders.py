@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app.glove_recommender import GloVeRecommender
+from app.tfidf_recommender import TfidfRecommender
+
+QUERIES = ["gin with lime", "bourbon and bitters", "coconut rum", "unknown words"]
+
+
+def assert_same_recommendations(recommender):
+    batch = recommender.recommend_batch(QUERIES, top_n=3)
+    assert len(batch) == len(QUERIES)
+    for query, records in zip(QUERIES, batch):
+        single = recommender.recommend(query, top_n=3)
+        assert [r["drink_title"] for r in records] == [r["drink_title"] for r in single]
+        np.testing.assert_allclose(
+            [r["relevance"] for r in records],
+            [r["relevance"] for r in single],
+            rtol=1e-5,
+        )
+
+
+def test_glove_batch_matches_single_queries(artifact_dir):
+    recommender = GloVeRecommender.from_files(
+        artifact_dir / "cocktail_data.csv", artifact_dir, threshold=-np.inf
+    )
+    assert_same_recommendations(recommender)
+
+
+def test_tfidf_batch_matches_single_queries(cocktail_df):
+    vectorizer = TfidfVectorizer()
+    tfidf_matrix = vectorizer.fit_transform(cocktail_df.whole_text)
+    recommender = TfidfRecommender(cocktail_df, vectorizer, tfidf_matrix, threshold=0.0)
+
+    assert_same_recommendations(recommender)
+    assert recommender.recommend("gin with lime")[0]["drink_title"] == "drink-0"
+
+
+NEW_DOCUMENTS = pd.DataFrame(
+    {
+        "drink_title": ["spritz"],
+        "drink_glass": "Wine",
+        "garnish": "",
+        "comment": "",
+        "history": "",
+        "how_to_translated": ["build aperol prosecco and soda over ice"],
+        "whole_text": ["build aperol prosecco and soda over ice"],
+    }
+)
+
+
+def assert_ingestion(recommender, query):
+    updated = recommender.with_documents(NEW_DOCUMENTS)
+    assert updated.recommend(query, top_n=1)[0]["drink_title"] == "spritz"
+    assert "spritz" not in [r["drink_title"] for r in recommender.recommend(query)]
+
+    deleted = updated.without_documents(["spritz", "drink-0"])
+    titles = [r["drink_title"] for r in deleted.recommend_batch(QUERIES, top_n=10)[0]]
+    assert "spritz" not in titles and "drink-0" not in titles
+
+    compacted = deleted.compacted()
+    assert len(compacted.df) == len(recommender.df) - 1
+    for expected, found in zip(
+        deleted.recommend_batch(QUERIES + [query], top_n=3),
+        compacted.recommend_batch(QUERIES + [query], top_n=3),
+    ):
+        assert [r["drink_title"] for r in expected] == [r["drink_title"] for r in found]
+
+
+def test_glove_incremental_ingestion(artifact_dir):
+    recommender = GloVeRecommender.from_files(
+        artifact_dir / "cocktail_data.csv", artifact_dir, threshold=-np.inf
+    )
+    assert_ingestion(recommender, NEW_DOCUMENTS.whole_text[0])
+
+
+def test_tfidf_incremental_ingestion_hashes_unseen_terms(cocktail_df):
+    vectorizer = TfidfVectorizer()
+    tfidf_matrix = vectorizer.fit_transform(cocktail_df.whole_text)
+    recommender = TfidfRecommender(cocktail_df, vectorizer, tfidf_matrix, threshold=0.0)
+
+    # "aperol" is not in the fitted vocabulary.
+    assert_ingestion(recommender, "aperol")
+
+
+def test_tfidf_ingestion_keeps_catalogue_scores(cocktail_df):
+    vectorizer = TfidfVectorizer()
+    tfidf_matrix = vectorizer.fit_transform(cocktail_df.whole_text)
+    recommender = TfidfRecommender(cocktail_df, vectorizer, tfidf_matrix, threshold=0.0)
+    updated = recommender.with_documents(NEW_DOCUMENTS)
+
+    query = "gin with aperol and lime"
+    before = recommender.recommend(query, top_n=len(cocktail_df))
+    after = [
+        r
+        for r in updated.recommend(query, top_n=len(cocktail_df) + 1)
+        if r["drink_title"] != "spritz"
+    ]
+    assert [r["drink_title"] for r in after] == [r["drink_title"] for r in before]
+    np.testing.assert_allclose(
+        [r["relevance"] for r in after], [r["relevance"] for r in before]
+    )
@@ -0,0 +1,123 @@
+import time
+
+import numpy as np
+
+from app.glove_recommender import GloVeRecommender
+from app.registry import ModelRegistry
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_candidate_is_shadowed_then_promoted(artifact_dir):
+    def loader(artifact_path):
+        return GloVeRecommender.from_files(
+            artifact_dir / "cocktail_data.csv", artifact_path, threshold=-np.inf
+        )
+
+    registry = ModelRegistry(loader, warmup_queries=["gin with lime"])
+    active = registry.load(artifact_dir)
+    assert registry.active is active
+    assert active.query_vector_cache.stats()["size"] == 1
+
+    assert registry.load_in_background(artifact_dir, activate=False)
+    wait_for(lambda: registry.candidate is not None and registry.loading is None)
+    candidate = registry.candidate
+    assert registry.active is active
+
+    queries = ["gin with lime", "coconut rum"]
+    results = active.recommend_batch(queries, top_n=3)
+    registry.shadow(queries, 3, results, 0.001)
+    wait_for(lambda: registry.stats()["shadow"]["samples"] == 1)
+    shadow = registry.stats()["shadow"]
+    assert shadow["mean_overlap"] == 1.0
+    assert shadow["candidate_ms"]["p50"] > 0
+
+    assert registry.promote() is candidate
+    assert registry.active is candidate and registry.candidate is None
+    assert not registry.replace(active, active)
+    registry.shutdown()
+
+
+def test_failed_background_load_keeps_active_version(artifact_dir):
+    def loader(artifact_path):
+        return GloVeRecommender.from_files(
+            artifact_dir / "cocktail_data.csv", artifact_path
+        )
+
+    registry = ModelRegistry(loader)
+    active = registry.load(artifact_dir)
+    assert registry.load_in_background(artifact_dir / "missing")
+    wait_for(lambda: registry.loading is None)
+    assert registry.last_error is not None
+    assert registry.active is active and registry.candidate is None
+    registry.shutdown()
+
+
+def test_result_cache_is_keyed_by_unique_versions(
+    artifact_dir, cocktail_df, monkeypatch
+):
+    from fastapi.testclient import TestClient
+
+    from app import main
+
+    renamed = artifact_dir / "renamed.csv"
+    cocktail_df.assign(drink_title=cocktail_df.drink_title + "-renamed").to_csv(
+        renamed, index=False
+    )
+
+    def loader(data_path=artifact_dir / "cocktail_data.csv"):
+        return GloVeRecommender.from_files(data_path, artifact_dir, threshold=-np.inf)
+
+    monkeypatch.setattr(main.registry, "loader", loader)
+    document = {"whole_text": "gin with lime and sugar"}
+    with TestClient(main.app) as client:
+        # Cached under the version of the initial load.
+        client.get("/query?query=gin lime")
+        client.post(
+            "/documents", json={"documents": [{**document, "drink_title": "ghost"}]}
+        )
+        titles = [
+            r["title"] for r in client.get("/query?query=gin lime").json()["results"]
+        ]
+        assert "ghost" in titles
+
+        # Reloading the same artifacts starts a new lineage.
+        main.registry.load()
+        client.post(
+            "/documents", json={"documents": [{**document, "drink_title": "other"}]}
+        )
+        response = client.get("/query?query=gin lime").json()
+        titles = [r["title"] for r in response["results"]]
+        assert "other" in titles and "ghost" not in titles
+
+        # Same artifacts, so the same manifest created_at, but other data.
+        main.registry.load(renamed)
+        renamed_response = client.get("/query?query=gin lime").json()
+        assert renamed_response["version"] != response["version"]
+        titles = [r["title"] for r in renamed_response["results"]]
+        assert titles and all(title.endswith("-renamed") for title in titles)
+
+
+def test_model_paths_must_stay_under_their_roots():
+    from fastapi.testclient import TestClient
+
+    from app import main
+
+    # Without entering the client, so the lifespan loads nothing.
+    client = TestClient(main.app)
+    for body in (
+        {"artifact_path": "../etc"},
+        {"artifact_path": "/tmp/model"},
+        {"artifact_path": "example", "data_path": "../../secrets.csv"},
+    ):
+        response = client.post("/models/load", json=body)
+        assert response.status_code == 400
+    assert main.registry.loading is None
+    assert main.resolve_under(main.MODELS_ROOT, "example") == str(
+        main.MODELS_ROOT / "example"
+    )
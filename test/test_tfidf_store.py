@@ -0,0 +1,28 @@
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app.tfidf_recommender import TfidfRecommender
+from utils.tfidf_store import load_tfidf, save_tfidf
+
+
+def test_round_trip_without_pickle(tmp_path, cocktail_df):
+    vectorizer = TfidfVectorizer(
+        strip_accents="unicode", stop_words="english", lowercase=True
+    )
+    tfidf_matrix = vectorizer.fit_transform(cocktail_df.whole_text)
+    save_tfidf(tmp_path / "tfidf", vectorizer, tfidf_matrix)
+    cocktail_df.to_csv(tmp_path / "cocktail_data.csv", index=False)
+
+    loaded_vectorizer, loaded_matrix, _ = load_tfidf(tmp_path / "tfidf")
+    assert not list(tmp_path.glob("**/*.pk"))
+    assert (loaded_matrix != tfidf_matrix).nnz == 0
+    query = ["shake gin with lime"]
+    np.testing.assert_allclose(
+        loaded_vectorizer.transform(query).toarray(),
+        vectorizer.transform(query).toarray(),
+    )
+
+    recommender = TfidfRecommender.from_files(
+        tmp_path / "cocktail_data.csv", tmp_path / "tfidf", threshold=0.0
+    )
+    assert recommender.recommend(query[0])[0]["drink_title"] == "drink-0"
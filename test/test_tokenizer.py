@@ -0,0 +1,79 @@
+import re
+
+import numpy as np
+
+from utils import tokenizer as tokenizer_module
+from utils.tokenizer import MyTokenizer, TextDataset
+
+
+def reference_tokenize(text, vocab, sentence_length):
+    words = re.findall(r"\b\w+\b", text.lower())[:sentence_length]
+    tokens = [vocab.get(w, vocab["<UNK>"]) for w in words]
+    return [vocab["<PAD>"]] * (sentence_length - len(tokens)) + tokens
+
+
+TEXTS = [
+    "Shake the Gin with lime juice",
+    "",
+    "a b c d e f g h i j k l m n o p",
+    "unseen tokens only: mezcal, yuzu!",
+]
+
+
+def test_encode_batch_matches_reference():
+    tokenizer = MyTokenizer(sentence_length=8)
+    tokenizer.fit(TEXTS[:3])
+
+    token_ids = tokenizer.encode_batch(TEXTS)
+    assert token_ids.dtype == np.int32 and token_ids.shape == (len(TEXTS), 8)
+    for row, text in zip(token_ids, TEXTS):
+        expected = reference_tokenize(text, tokenizer.vocab, 8)
+        assert row.tolist() == expected == tokenizer(text)
+
+
+def test_parallel_encode_batch(monkeypatch):
+    monkeypatch.setattr(tokenizer_module, "PARALLEL_MIN_TEXTS", 1)
+    tokenizer = MyTokenizer(sentence_length=8)
+    tokenizer.fit(TEXTS)
+    texts = TEXTS * 50
+
+    np.testing.assert_array_equal(
+        tokenizer_module.encode_batch(
+            texts, tokenizer.vocab, sentence_length=8, n_jobs=2, chunk_size=16
+        ),
+        tokenizer.encode_batch(texts),
+    )
+
+
+def test_small_inputs_are_encoded_without_a_pool(monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("a process pool was started")
+
+    monkeypatch.setattr(tokenizer_module, "ProcessPoolExecutor", no_pool)
+    tokenizer = MyTokenizer(sentence_length=8)
+    tokenizer.fit(TEXTS)
+
+    chunks = tokenizer.encode_chunks(TEXTS, chunk_size=2, n_jobs=4)
+    np.testing.assert_array_equal(
+        np.concatenate(list(chunks)), tokenizer.encode_batch(TEXTS)
+    )
+
+
+def test_text_dataset_items(cocktail_df):
+    tokenizer = MyTokenizer(sentence_length=12)
+    tokenizer.fit(cocktail_df.whole_text)
+    dataset = TextDataset(cocktail_df, tokenizer.vocab, 12)
+
+    assert len(dataset) == len(cocktail_df)
+    assert dataset[2].tolist() == tokenizer(cocktail_df.whole_text[2])
+
+
+def test_vocabulary_ids_are_ordered_by_frequency_then_token():
+    tokenizer = MyTokenizer(sentence_length=4)
+    tokenizer.fit(["Gin lime gin", "rum lime GIN", "bitters"], max_size=3)
+
+    assert tokenizer.inverse_vocab == ["<PAD>", "<UNK>", "gin", "lime", "bitters"]
+    assert tokenizer.vocab["lime"] == 3 and "rum" not in tokenizer.vocab
+
+    tokenizer.fit(["Gin lime gin", "rum lime GIN", "bitters"], min_freq=2)
+    assert tokenizer.inverse_vocab == ["<PAD>", "<UNK>", "gin", "lime"]
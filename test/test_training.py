@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+import torch
+import torch.nn as nn
+
+from utils.autoencoder import Autoencoder
+from utils.train_embedding import train_autoencoder
+
+
+def make_training_run(data, **kwargs):
+    torch.manual_seed(0)
+    model = Autoencoder(300, 200, 100)
+    optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
+    return train_autoencoder(model, data, nn.MSELoss(), optimizer, **kwargs)
+
+
+def test_early_stopping_and_resume(tmp_path, caplog):
+    data = np.random.default_rng(0).random((64, 300), dtype=np.float32)
+    checkpoint_path = tmp_path / "checkpoint.pt"
+
+    caplog.set_level("INFO")
+    make_training_run(data, epochs=2, batch_size=16, checkpoint_path=checkpoint_path)
+    assert torch.load(checkpoint_path)["epoch"] == 1
+
+    caplog.clear()
+    make_training_run(
+        data, epochs=3, batch_size=16, checkpoint_path=checkpoint_path, resume=True
+    )
+    assert "Resuming training" in caplog.text
+    assert "Epoch 3/3" in caplog.text and "Epoch 1/3" not in caplog.text
+
+    # Without resume an existing checkpoint is overwritten, not picked up.
+    caplog.clear()
+    make_training_run(data, epochs=1, batch_size=16, checkpoint_path=checkpoint_path)
+    assert "Resuming training" not in caplog.text and "Epoch 1/1" in caplog.text
+    assert torch.load(checkpoint_path)["epoch"] == 0
+
+    # A checkpoint from other data is refused.
+    with pytest.raises(ValueError, match="other data"):
+        make_training_run(
+            data[:32],
+            epochs=2,
+            batch_size=16,
+            checkpoint_path=checkpoint_path,
+            resume=True,
+        )
+
+    caplog.clear()
+    make_training_run(data, epochs=50, batch_size=16, patience=1, min_delta=1e9)
+    assert "Early stopping" in caplog.text and "Epoch 3/50" not in caplog.text
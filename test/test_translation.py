@@ -0,0 +1,93 @@
+import sys
+import types
+
+from scripts.translation import (
+    CachedTranslator,
+    GoogletransBackend,
+    StubBackend,
+    TranslationCache,
+)
+
+
+class FakeTranslator:
+    # Mirrors googletrans 4.0.0-rc1: one str in, one Translated out.
+    def __init__(self):
+        self.calls = []
+
+    def translate(self, text, src, dest):
+        if not isinstance(text, str):
+            raise TypeError("'Translated' object is not iterable")
+        self.calls.append(text)
+        if text == "Falha.":
+            raise ValueError("bad response")
+        return types.SimpleNamespace(text=f"{dest}:{text}")
+
+
+class FailingBackend:
+    def translate(self, texts, src, dest):
+        raise RuntimeError("rate limited")
+
+
+def test_translates_only_unseen_distinct_texts(tmp_path):
+    path = tmp_path / "translations.sqlite"
+    backend = StubBackend({"Mexa com gelo.": "Stir with ice."})
+    translator = CachedTranslator(backend, TranslationCache(path), batch_size=2)
+
+    texts = ["Mexa com gelo.", "Bata.", "Mexa com gelo.", "Coe."]
+    assert translator.translate(texts) == [
+        "Stir with ice.",
+        "[en] Bata.",
+        "Stir with ice.",
+        "[en] Coe.",
+    ]
+    assert backend.calls == [["Mexa com gelo.", "Bata."], ["Coe."]]
+    translator.cache.close()
+
+    # A later run reads everything back from disk.
+    backend = StubBackend()
+    cache = TranslationCache(path)
+    translator = CachedTranslator(backend, cache)
+    assert translator.translate(texts + ["Sirva."])[0] == "Stir with ice."
+    assert backend.calls == [["Sirva."]]
+    assert len(cache) == 4
+
+    # The language pair is part of the key.
+    other = CachedTranslator(backend, cache, src="pt", dest="es")
+    assert other.translate(["Bata."]) == ["[es] Bata."]
+
+
+def test_failed_batches_fall_back_and_are_retried(tmp_path):
+    cache = TranslationCache(tmp_path / "translations.sqlite")
+    assert CachedTranslator(FailingBackend(), cache).translate(["Bata."]) == ["Bata."]
+    assert len(cache) == 0
+
+    backend = StubBackend()
+    assert CachedTranslator(backend, cache).translate(["Bata."]) == ["[en] Bata."]
+    assert backend.calls == [["Bata."]]
+
+
+def test_googletrans_backend_translates_each_text_with_a_throttle(
+    monkeypatch, tmp_path
+):
+    monkeypatch.setitem(
+        sys.modules, "googletrans", types.SimpleNamespace(Translator=FakeTranslator)
+    )
+    now, sleeps = [0.0], []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    backend = GoogletransBackend(min_interval=2.0, clock=lambda: now[0], sleep=sleep)
+    cache = TranslationCache(tmp_path / "translations.sqlite")
+    texts = ["Bata.", "Falha.", "Coe."]
+    assert CachedTranslator(backend, cache).translate(texts) == [
+        "en:Bata.",
+        "Falha.",
+        "en:Coe.",
+    ]
+    assert backend.translator.calls == texts
+    assert sleeps == [2.0, 2.0]
+    # Only the failed text is sent again.
+    assert CachedTranslator(backend, cache).translate(texts)[1] == "Falha."
+    assert backend.translator.calls[3:] == ["Falha."]
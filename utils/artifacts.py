@@ -0,0 +1,119 @@
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from utils.autoencoder import Autoencoder
+from utils.encoder_export import ENCODER_FILE, load_encoder
+from utils.index import load_index
+from utils.tokenizer import MyTokenizer
+
+# 2: document and query embeddings mean-pool only non-padding tokens.
+ARTIFACT_VERSION = 2
+
+MANIFEST_FILE = "manifest.json"
+TOKENIZER_FILE = "tokenizer.json"
+EMBEDDING_MATRIX_FILE = "embedding_matrix.npy"
+MODEL_FILE = "autoencoder_model.pth"
+EMBEDDINGS_FILE = "glove_trained_embeddings.npy"
+INDEX_DIR = "index"
+
+
+class ArtifactBundle:
+    """Everything GloVeRecommender needs at query time, as produced by training."""
+
+    def __init__(
+        self,
+        tokenizer,
+        embedding_matrix,
+        model,
+        embeddings,
+        manifest=None,
+        index=None,
+        encoder=None,
+    ):
+        self.tokenizer = tokenizer
+        self.embedding_matrix = embedding_matrix
+        self.model = model
+        self.embeddings = embeddings
+        self.manifest = manifest or {}
+        self.index = index
+        self.encoder = encoder if encoder is not None else model.encoder
+
+    @property
+    def version(self):
+        return self.manifest.get("created_at")
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+
+        first, second, bottleneck = (
+            self.model.encoder[0],
+            self.model.encoder[2],
+            self.model.encoder[4],
+        )
+        self.manifest = {
+            "version": ARTIFACT_VERSION,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "input_dim": first.in_features,
+            "hidden_fst": first.out_features,
+            "hidden_snd": second.out_features,
+            "output_dim": bottleneck.out_features,
+            "vocab_size": self.tokenizer.vocab_size,
+            "num_documents": len(self.embeddings),
+        }
+
+        self.tokenizer.save(path / TOKENIZER_FILE)
+        np.save(
+            path / EMBEDDING_MATRIX_FILE,
+            np.asarray(self.embedding_matrix, dtype=np.float32),
+        )
+        torch.save(self.model.state_dict(), path / MODEL_FILE)
+        np.save(path / EMBEDDINGS_FILE, np.asarray(self.embeddings, dtype=np.float32))
+        with open(path / MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2)
+        if self.index is not None:
+            self.save_index(path)
+        elif (path / INDEX_DIR).is_dir():
+            shutil.rmtree(path / INDEX_DIR)
+        # An exported encoder belongs to the weights it was exported from.
+        (path / ENCODER_FILE).unlink(missing_ok=True)
+
+    def save_index(self, path):
+        self.index.save(Path(path) / INDEX_DIR)
+
+    @classmethod
+    def load(cls, path, mmap_mode="r", serving=False):
+        """With serving=True an exported encoder.pt is used instead of the full model."""
+        path = Path(path)
+        with open(path / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != ARTIFACT_VERSION:
+            raise ValueError(
+                f"Artifacts in {path} have version {manifest.get('version')}, "
+                f"expected {ARTIFACT_VERSION}; retrain with utils/train_embedding.py"
+            )
+
+        tokenizer = MyTokenizer.load(path / TOKENIZER_FILE)
+        embedding_matrix = np.load(path / EMBEDDING_MATRIX_FILE, mmap_mode=mmap_mode)
+        model, encoder = None, None
+        if serving and (path / ENCODER_FILE).exists():
+            encoder = load_encoder(path / ENCODER_FILE)
+        else:
+            model = Autoencoder(
+                manifest["input_dim"], manifest["hidden_fst"], manifest["hidden_snd"]
+            )
+            model.load_state_dict(torch.load(path / MODEL_FILE, weights_only=True))
+            model.eval()
+        embeddings = np.load(path / EMBEDDINGS_FILE, mmap_mode=mmap_mode)
+        index = None
+        if (path / INDEX_DIR).is_dir():
+            index = load_index(path / INDEX_DIR, embeddings, mmap_mode=mmap_mode)
+
+        return cls(
+            tokenizer, embedding_matrix, model, embeddings, manifest, index, encoder
+        )
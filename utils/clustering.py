@@ -0,0 +1,29 @@
+import numpy as np
+
+
+def kmeans(vectors, n_clusters, n_iter, rng, spherical=False):
+    """Lloyd's k-means; spherical assigns by inner product to unit centroids."""
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    if spherical:
+        centroids = _unit_rows(centroids)
+    for _ in range(n_iter):
+        if spherical:
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+        else:
+            # Squared L2 distance up to the per-vector constant |x|^2.
+            distances = (centroids**2).sum(axis=1) - 2 * vectors @ centroids.T
+            assignment = np.argmin(distances, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=n_clusters)
+        nonempty = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+        sums = np.add.reduceat(vectors[order], starts, axis=0)
+        centroids[nonempty] = sums / counts[nonempty, None]
+        if spherical:
+            centroids[nonempty] = _unit_rows(centroids[nonempty])
+    return centroids
+
+
+def _unit_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, np.finfo(matrix.dtype).tiny)
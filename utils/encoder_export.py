@@ -0,0 +1,77 @@
+import argparse
+import copy
+import time
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+
+ENCODER_FILE = "encoder.pt"
+
+
+def export_encoder(model, path, quantize=False):
+    """Save model.encoder alone as a frozen TorchScript module.
+
+    With quantize=True the nn.Linear layers are dynamically quantized to int8
+    first; activations stay float32 so callers don't change.
+    """
+    encoder = copy.deepcopy(model.encoder).eval()
+    if quantize:
+        encoder = torch.ao.quantization.quantize_dynamic(
+            encoder, {nn.Linear}, dtype=torch.qint8
+        )
+    example = torch.zeros(1, model.encoder[0].in_features)
+    with torch.no_grad():
+        scripted = torch.jit.freeze(torch.jit.trace(encoder, example))
+    torch.jit.save(scripted, str(path))
+    return scripted
+
+
+def load_encoder(path):
+    return torch.jit.load(str(path), map_location="cpu").eval()
+
+
+def encoder_parity(reference, candidate, inputs):
+    with torch.no_grad():
+        expected = reference(inputs)
+        found = candidate(inputs)
+    return {
+        "max_abs_error": (expected - found).abs().max().item(),
+        "min_cosine": nn.functional.cosine_similarity(expected, found, dim=1)
+        .min()
+        .item(),
+    }
+
+
+def _latency_us(encoder, inputs, repeats=1000):
+    with torch.no_grad():
+        encoder(inputs)
+        started = time.perf_counter()
+        for _ in range(repeats):
+            encoder(inputs)
+    return (time.perf_counter() - started) / repeats * 1e6
+
+
+if __name__ == "__main__":
+    from utils.artifacts import ArtifactBundle
+
+    parser = argparse.ArgumentParser(
+        description="Export the serving encoder of an artifact bundle"
+    )
+    parser.add_argument("artifact_path")
+    parser.add_argument("--quantize", action="store_true")
+    args = parser.parse_args()
+
+    bundle = ArtifactBundle.load(args.artifact_path)
+    encoder = export_encoder(
+        bundle.model, Path(args.artifact_path) / ENCODER_FILE, quantize=args.quantize
+    )
+
+    inputs = torch.from_numpy(bundle.embedding_matrix[:256].copy())
+    parity = encoder_parity(bundle.model.encoder, encoder, inputs)
+    print(
+        f"max abs error {parity['max_abs_error']:.2e}, "
+        f"min cosine {parity['min_cosine']:.5f}, "
+        f"latency eager {_latency_us(bundle.model.encoder, inputs[:1]):.1f}us "
+        f"-> exported {_latency_us(encoder, inputs[:1]):.1f}us"
+    )
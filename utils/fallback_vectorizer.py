@@ -0,0 +1,79 @@
+import numpy as np
+from scipy import sparse
+from scipy.sparse import linalg as splinalg
+from sklearn.preprocessing import normalize
+from sklearn.utils import murmurhash3_32
+
+N_HASH_FEATURES = 2**18
+
+
+class HashingFallbackVectorizer:
+    """A fitted TfidfVectorizer whose out-of-vocabulary terms are hashed.
+
+    Known terms keep their columns and idf; any other term goes to one of
+    n_features extra columns and is weighted like the rarest known term. For
+    text made only of known terms transform matches vectorizer.transform, so
+    documents can be appended without refitting the vocabulary.
+    """
+
+    def __init__(self, vectorizer, n_features=N_HASH_FEATURES):
+        self.vectorizer = vectorizer
+        self.n_features = n_features
+        self.vocabulary_ = vectorizer.vocabulary_
+        self.n_known = len(vectorizer.vocabulary_)
+        self._analyze = vectorizer.build_analyzer()
+        self.idf_ = None
+        if vectorizer.use_idf:
+            self.idf_ = np.concatenate(
+                (vectorizer.idf_, np.full(n_features, vectorizer.idf_.max()))
+            )
+
+    @property
+    def n_columns(self):
+        return self.n_known + self.n_features
+
+    def _column(self, term):
+        column = self.vocabulary_.get(term)
+        if column is None:
+            column = (
+                self.n_known + murmurhash3_32(term, positive=True) % self.n_features
+            )
+        return column
+
+    def transform(self, texts, norm_known_only=False):
+        """Vectorize texts; see the class docstring.
+
+        With norm_known_only rows are normalized by their known-vocabulary
+        part alone, so a query scores the fitted documents exactly as
+        vectorizer.transform would, whatever unseen terms it contains.
+        """
+        columns, indptr = [], [0]
+        for text in texts:
+            columns.extend(self._column(term) for term in self._analyze(text))
+            indptr.append(len(columns))
+        counts = sparse.csr_matrix(
+            (np.ones(len(columns)), np.array(columns, dtype=np.int64), indptr),
+            shape=(len(indptr) - 1, self.n_columns),
+            dtype=self.vectorizer.dtype,
+        )
+        counts.sum_duplicates()
+
+        if self.vectorizer.binary:
+            counts.data[:] = 1
+        if self.vectorizer.sublinear_tf:
+            np.log(counts.data, counts.data)
+            counts.data += 1
+        if self.idf_ is not None:
+            counts = counts @ sparse.diags(self.idf_.astype(counts.dtype))
+        counts = sparse.csr_matrix(counts)
+        if self.vectorizer.norm:
+            if not norm_known_only:
+                return normalize(counts, norm=self.vectorizer.norm, copy=False)
+            order = {"l1": 1, "l2": 2}[self.vectorizer.norm]
+            norms = splinalg.norm(counts[:, : self.n_known], ord=order, axis=1)
+            # Rows without a known term fall back to their full norm.
+            unknown = norms == 0
+            norms[unknown] = splinalg.norm(counts[unknown], ord=order, axis=1)
+            norms[norms == 0] = 1
+            counts = sparse.csr_matrix(sparse.diags(1 / norms) @ counts)
+        return counts
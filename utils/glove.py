@@ -1,5 +1,38 @@
+import sys
+from pathlib import Path
+
+import numpy as np
 import torch
 
+VECTORS_FILE = "vectors.npy"
+WORDS_FILE = "words.txt"
+
+
+class GloveVectors:
+    """Read-only word -> vector mapping backed by a (memory-mapped) matrix."""
+
+    def __init__(self, words: list, vectors: np.ndarray):
+        self.words = words
+        self.vectors = vectors
+        self.index = {word: i for i, word in enumerate(words)}
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return word in self.index
+
+    def __getitem__(self, word):
+        return self.vectors[self.index[word]]
+
+    def get(self, word, default=None):
+        row = self.index.get(word)
+        return default if row is None else self.vectors[row]
+
 
 class Glove:
     @staticmethod
@@ -14,3 +47,55 @@ class Glove:
                 )
                 glove_vectors[word] = vector
         return glove_vectors
+
+    @staticmethod
+    def convert_to_binary(glove_file, output_dir, dtype=np.float32):
+        words = []
+        rows = []
+        with open(glove_file, "r", encoding="utf-8") as f:
+            for line in f:
+                word, values = line.rstrip("\n").split(" ", 1)
+                words.append(word)
+                rows.append(np.array(values.split(), dtype=np.float32))
+
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        np.save(output_dir / VECTORS_FILE, np.vstack(rows).astype(dtype))
+        with open(output_dir / WORDS_FILE, "w", encoding="utf-8") as f:
+            f.write("\n".join(words))
+        return output_dir
+
+    @staticmethod
+    def load_binary(binary_dir, mmap_mode="r") -> GloveVectors:
+        binary_dir = Path(binary_dir)
+        vectors = np.load(binary_dir / VECTORS_FILE, mmap_mode=mmap_mode)
+        with open(binary_dir / WORDS_FILE, "r", encoding="utf-8") as f:
+            words = f.read().split("\n")
+        if len(words) != vectors.shape[0]:
+            raise ValueError(
+                f"{binary_dir} is inconsistent: {len(words)} words for {vectors.shape[0]} vectors"
+            )
+        return GloveVectors(words, vectors)
+
+    @staticmethod
+    def load_vectors(path):
+        """The binary store at path, else the text file path or path + ".txt"."""
+        path = Path(path)
+        if path.is_dir():
+            return Glove.load_binary(path)
+        for text_file in (path, path.with_name(path.name + ".txt")):
+            if text_file.is_file():
+                return Glove._load_glove_vectors(text_file)
+        raise FileNotFoundError(
+            f"No GloVe vectors at {path} or {path}.txt; run `make glove-binary` "
+            "to convert the downloaded text file"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4):
+        sys.exit(
+            "usage: python -m utils.glove <glove.txt> <output_dir> [float32|float16]"
+        )
+    dtype = np.dtype(sys.argv[3]) if len(sys.argv) == 4 else np.float32
+    Glove.convert_to_binary(sys.argv[1], sys.argv[2], dtype=dtype)
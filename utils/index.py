@@ -0,0 +1,266 @@
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+
+from utils import ranking
+from utils.clustering import kmeans
+from utils.quantization import CODECS
+
+INDEX_FILE = "index.json"
+CENTROIDS_FILE = "centroids.npy"
+LIST_ORDER_FILE = "list_order.npy"
+LIST_OFFSETS_FILE = "list_offsets.npy"
+
+ASSIGN_CHUNK_SIZE = 65536
+
+
+class BruteForceIndex:
+    """Exact inner-product search over every document embedding."""
+
+    kind = "brute_force"
+
+    def __init__(self, embeddings=None):
+        self.embeddings = embeddings
+
+    def build(self, embeddings):
+        self.embeddings = embeddings
+        return self
+
+    def search(self, query_vectors, top_n, threshold=None):
+        relevance_scores = np.asarray(query_vectors) @ np.asarray(self.embeddings).T
+        return [ranking.top_n(scores, top_n, threshold) for scores in relevance_scores]
+
+    def params(self):
+        return {}
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        with open(path / INDEX_FILE, "w", encoding="utf-8") as f:
+            json.dump({"kind": self.kind, **self.params()}, f, indent=2)
+
+    @classmethod
+    def load(cls, path, embeddings, mmap_mode="r"):
+        return cls(embeddings)
+
+
+class IVFIndex(BruteForceIndex):
+    """Inverted-file index: k-means coarse clusters, only n_probe of them are scored.
+
+    Clustering, list assignment and probing all rank centroids by inner
+    product, the metric searched, so the clusters are spherical k-means ones.
+    """
+
+    kind = "ivf"
+
+    def __init__(self, embeddings=None, n_lists=None, n_probe=8):
+        super().__init__(embeddings)
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.centroids = None
+        self.list_order = None
+        self.list_offsets = None
+
+    def build(self, embeddings, n_iter=20, seed=0):
+        self.embeddings = embeddings
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if self.n_lists is None:
+            self.n_lists = max(1, int(np.sqrt(len(vectors))))
+        self.n_lists = min(self.n_lists, len(vectors))
+
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(vectors), 256 * self.n_lists)
+        sample = vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+        self.centroids = kmeans(sample, self.n_lists, n_iter, rng, spherical=True)
+
+        assignment = _assign(vectors, self.centroids)
+        self.list_order = np.argsort(assignment, kind="stable").astype(np.int64)
+        counts = np.bincount(assignment, minlength=self.n_lists)
+        self.list_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        return self
+
+    def search(self, query_vectors, top_n, threshold=None, n_probe=None):
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        query_vectors = np.asarray(query_vectors, dtype=np.float32)
+        probed_lists = _probe_lists(query_vectors @ self.centroids.T, n_probe)
+
+        results = []
+        for query_vector, lists in zip(query_vectors, probed_lists):
+            candidates = np.concatenate(
+                [
+                    self.list_order[self.list_offsets[i] : self.list_offsets[i + 1]]
+                    for i in lists
+                ]
+            )
+            candidates.sort()
+            scores = np.asarray(self.embeddings[candidates]) @ query_vector
+            top_indices, top_scores = ranking.top_n(scores, top_n, threshold)
+            results.append((candidates[top_indices], top_scores))
+        return results
+
+    def params(self):
+        return {"n_lists": self.n_lists, "n_probe": self.n_probe}
+
+    def save(self, path):
+        super().save(path)
+        path = Path(path)
+        np.save(path / CENTROIDS_FILE, self.centroids)
+        np.save(path / LIST_ORDER_FILE, self.list_order)
+        np.save(path / LIST_OFFSETS_FILE, self.list_offsets)
+
+    @classmethod
+    def load(cls, path, embeddings, mmap_mode="r"):
+        path = Path(path)
+        with open(path / INDEX_FILE, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(embeddings, n_lists=meta["n_lists"], n_probe=meta["n_probe"])
+        index.centroids = np.load(path / CENTROIDS_FILE)
+        index.list_order = np.load(path / LIST_ORDER_FILE, mmap_mode=mmap_mode)
+        index.list_offsets = np.load(path / LIST_OFFSETS_FILE)
+        return index
+
+
+class QuantizedIndex(BruteForceIndex):
+    """Scores compressed codes, then rescores the best candidates exactly.
+
+    codec is one of utils.quantization.CODECS. Only top_n * rescore rows of
+    the full-precision embeddings are read per query, so they can stay
+    memory-mapped on disk; rescore=0 returns the approximate scores as is.
+    """
+
+    kind = "quantized"
+
+    def __init__(self, embeddings=None, codec="int8", rescore=4, **codec_params):
+        super().__init__(embeddings)
+        self.codec_name = codec
+        self.rescore = rescore
+        self.codec_params = codec_params
+        self.codec = None
+
+    def build(self, embeddings, seed=0):
+        self.embeddings = embeddings
+        codec = CODECS[self.codec_name](**self.codec_params)
+        self.codec = codec.fit(embeddings, seed=seed)
+        return self
+
+    def search(self, query_vectors, top_n, threshold=None, rescore=None):
+        rescore = self.rescore if rescore is None else rescore
+        query_vectors = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        approximate = self.codec.score(query_vectors)
+        if not rescore:
+            return [ranking.top_n(scores, top_n, threshold) for scores in approximate]
+
+        results = []
+        for query_vector, scores in zip(query_vectors, approximate):
+            candidates, _ = ranking.top_n(scores, top_n * rescore)
+            candidates.sort()
+            exact = np.asarray(self.embeddings[candidates]) @ query_vector
+            top_indices, top_scores = ranking.top_n(exact, top_n, threshold)
+            results.append((candidates[top_indices], top_scores))
+        return results
+
+    def params(self):
+        return {
+            "codec": self.codec_name,
+            "rescore": self.rescore,
+            **self.codec.params(),
+        }
+
+    def save(self, path):
+        super().save(path)
+        self.codec.save(path)
+
+    @classmethod
+    def load(cls, path, embeddings, mmap_mode="r"):
+        path = Path(path)
+        with open(path / INDEX_FILE, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        codec_params = {
+            key: value
+            for key, value in meta.items()
+            if key not in ("kind", "codec", "rescore")
+        }
+        index = cls(embeddings, meta["codec"], meta["rescore"], **codec_params)
+        index.codec = CODECS[meta["codec"]].load(
+            path, codec_params, mmap_mode=mmap_mode
+        )
+        return index
+
+
+INDEXES = {index.kind: index for index in (BruteForceIndex, IVFIndex, QuantizedIndex)}
+
+
+def load_index(path, embeddings, mmap_mode="r"):
+    with open(Path(path) / INDEX_FILE, "r", encoding="utf-8") as f:
+        kind = json.load(f)["kind"]
+    if kind not in INDEXES:
+        raise ValueError(f"Unknown index kind {kind!r} in {path}")
+    return INDEXES[kind].load(path, embeddings, mmap_mode=mmap_mode)
+
+
+def recall_at_k(index, query_vectors, k=10, exact_index=None):
+    exact_index = exact_index or BruteForceIndex(index.embeddings)
+    approximate = index.search(query_vectors, k)
+    exact = exact_index.search(query_vectors, k)
+    hits = [
+        len(np.intersect1d(found, expected)) / max(len(expected), 1)
+        for (found, _), (expected, _) in zip(approximate, exact)
+    ]
+    return float(np.mean(hits))
+
+
+def _probe_lists(centroid_scores, n_probe):
+    return np.argpartition(-centroid_scores, n_probe - 1, axis=1)[:, :n_probe]
+
+
+def _assign(vectors, centroids):
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), ASSIGN_CHUNK_SIZE):
+        chunk = vectors[start : start + ASSIGN_CHUNK_SIZE]
+        assignment[start : start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignment
+
+
+if __name__ == "__main__":
+    from utils.artifacts import ArtifactBundle
+
+    parser = argparse.ArgumentParser(
+        description="Build a search index for an artifact bundle"
+    )
+    parser.add_argument("artifact_path")
+    parser.add_argument("--kind", choices=sorted(INDEXES), default=IVFIndex.kind)
+    parser.add_argument("--n-lists", type=int, default=None)
+    parser.add_argument("--n-probe", type=int, default=8)
+    parser.add_argument("--codec", choices=sorted(CODECS), default="int8")
+    parser.add_argument("--rescore", type=int, default=4)
+    parser.add_argument("--n-subspaces", type=int, default=None)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    bundle = ArtifactBundle.load(args.artifact_path)
+    index = INDEXES[args.kind](bundle.embeddings)
+    if isinstance(index, IVFIndex):
+        index.n_lists, index.n_probe = args.n_lists, args.n_probe
+    if isinstance(index, QuantizedIndex):
+        index.codec_name, index.rescore = args.codec, args.rescore
+        if args.codec == "pq":
+            index.codec_params = {"n_subspaces": args.n_subspaces}
+    index.build(bundle.embeddings)
+    bundle.index = index
+    bundle.save_index(args.artifact_path)
+
+    rng = np.random.default_rng(0)
+    sample = rng.choice(len(bundle.embeddings), min(1000, len(bundle.embeddings)))
+    recall = recall_at_k(index, np.asarray(bundle.embeddings[sample]), k=args.k)
+    print(f"{args.kind} {index.params()} recall@{args.k}: {recall:.3f}")
+    if isinstance(index, QuantizedIndex):
+        rescore, index.rescore = index.rescore, 0
+        recall = recall_at_k(index, np.asarray(bundle.embeddings[sample]), k=args.k)
+        index.rescore = rescore
+        print(
+            f"without rescoring recall@{args.k}: {recall:.3f}; "
+            f"{index.codec.nbytes / 2**20:.1f} MiB of codes vs "
+            f"{bundle.embeddings.nbytes / 2**20:.1f} MiB of float32 embeddings"
+        )
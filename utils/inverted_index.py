@@ -0,0 +1,90 @@
+import numpy as np
+from scipy import sparse
+
+from utils import ranking
+
+
+class InvertedIndex:
+    """Term -> (document, weight) posting lists over a fitted TF-IDF matrix."""
+
+    def __init__(self, offsets, documents, weights, max_weights, n_documents):
+        self.offsets = offsets
+        self.documents = documents
+        self.weights = weights
+        self.max_weights = max_weights
+        self.n_documents = n_documents
+
+    @classmethod
+    def from_matrix(cls, tfidf_matrix):
+        postings = sparse.csc_matrix(tfidf_matrix)
+        postings.sort_indices()
+        offsets = postings.indptr.astype(np.int64)
+        max_weights = np.zeros(postings.shape[1], dtype=postings.dtype)
+        nonempty = np.flatnonzero(np.diff(offsets))
+        if len(nonempty):
+            max_weights[nonempty] = np.maximum.reduceat(
+                postings.data, offsets[nonempty]
+            )
+        return cls(
+            offsets, postings.indices, postings.data, max_weights, postings.shape[0]
+        )
+
+    def _posting(self, term):
+        start, end = self.offsets[term], self.offsets[term + 1]
+        return self.documents[start:end], self.weights[start:end]
+
+    def search(self, query_vector, top_n, threshold=None, prune=True):
+        """Score only documents sharing a term with the query, best first.
+
+        With prune=True, terms are visited by decreasing score upper bound and
+        MaxScore-style termination stops admitting new documents once the
+        remaining terms can no longer lift an unseen document into the top n.
+        """
+        query_vector = sparse.csr_matrix(query_vector)
+        terms, query_weights = query_vector.indices, query_vector.data
+        upper_bounds = query_weights * self.max_weights[terms]
+        order = np.argsort(-upper_bounds, kind="stable")
+        remaining_bounds = np.concatenate(
+            (np.cumsum(upper_bounds[order][::-1])[::-1][1:], [0.0])
+        )
+        min_score = -np.inf if threshold is None else threshold
+
+        documents = np.empty(0, dtype=np.int64)
+        scores = np.empty(0, dtype=np.float64)
+        admitting = True
+        for term, query_weight, remaining in zip(
+            terms[order], query_weights[order], remaining_bounds
+        ):
+            posting_documents, posting_weights = self._posting(term)
+            if not len(posting_documents):
+                # e.g. a hashed term no stored document contains
+                continue
+            contributions = query_weight * posting_weights
+            if admitting:
+                documents, inverse = np.unique(
+                    np.concatenate((documents, posting_documents)), return_inverse=True
+                )
+                scores = np.bincount(
+                    inverse,
+                    weights=np.concatenate((scores, contributions)),
+                    minlength=len(documents),
+                )
+            else:
+                positions = np.searchsorted(documents, posting_documents)
+                found = positions < len(documents)
+                found[found] = documents[positions[found]] == posting_documents[found]
+                scores[positions[found]] += contributions[found]
+
+            if not prune:
+                continue
+            bound = min_score
+            if len(scores) >= top_n > 0:
+                bound = max(bound, np.partition(scores, -top_n)[-top_n])
+            if admitting and remaining <= bound:
+                admitting = False
+            if not admitting:
+                keep = scores + remaining >= bound
+                documents, scores = documents[keep], scores[keep]
+
+        top_indices, top_scores = ranking.top_n(scores, top_n, threshold)
+        return documents[top_indices], top_scores
@@ -0,0 +1,27 @@
+import numpy as np
+from scipy import sparse
+
+
+def ragged_mean_pool(flat_ids, lengths, embedding_matrix, dtype=np.float32):
+    """Mean of embedding rows per segment of flat_ids; empty segments pool to zero.
+
+    The gather and sum happen as one sparse (segments x vocab) count matrix
+    product, so no (tokens x dim) intermediate is ever materialized.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    indptr = np.concatenate(([0], np.cumsum(lengths)))
+    counts = sparse.csr_matrix(
+        (np.ones(len(flat_ids), dtype=dtype), np.asarray(flat_ids), indptr),
+        shape=(len(lengths), embedding_matrix.shape[0]),
+    )
+    sums = np.asarray(counts @ np.asarray(embedding_matrix, dtype=dtype))
+    return sums / np.maximum(lengths, 1)[:, None].astype(dtype)
+
+
+def masked_mean_pool(token_ids, embedding_matrix, pad_id=0, dtype=np.float32):
+    """Mean of embedding rows per row of a padded id array, ignoring pad_id."""
+    token_ids = np.asarray(token_ids)
+    mask = token_ids != pad_id
+    return ragged_mean_pool(
+        token_ids[mask], mask.sum(axis=1), embedding_matrix, dtype=dtype
+    )
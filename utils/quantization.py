@@ -0,0 +1,186 @@
+from pathlib import Path
+
+import numpy as np
+
+from utils.clustering import kmeans
+
+CODES_FILE = "codes.npy"
+SCALES_FILE = "scales.npy"
+CODEBOOKS_FILE = "codebooks.npy"
+
+SCORE_CHUNK_SIZE = 65536
+PQ_CENTROIDS = 256
+PQ_TRAIN_SIZE = 64 * PQ_CENTROIDS
+
+
+class Float16Codec:
+    """Document embeddings stored as float16; half the bytes of float32."""
+
+    name = "float16"
+
+    def __init__(self):
+        self.codes = None
+
+    def fit(self, vectors, seed=0):
+        self.codes = np.empty(vectors.shape, dtype=np.float16)
+        for start in range(0, len(vectors), SCORE_CHUNK_SIZE):
+            chunk = np.asarray(vectors[start : start + SCORE_CHUNK_SIZE])
+            self.codes[start : start + len(chunk)] = chunk
+        return self
+
+    def score(self, query_vectors):
+        """Approximate inner products, shape (n_queries, n_documents)."""
+        query_vectors = np.asarray(query_vectors, dtype=np.float32)
+        queries = self._prepare(query_vectors)
+        scores = np.empty((len(query_vectors), len(self.codes)), dtype=np.float32)
+        # Decode a chunk at a time so only SCORE_CHUNK_SIZE float32 rows exist.
+        for start in range(0, len(self.codes), SCORE_CHUNK_SIZE):
+            stop = min(start + SCORE_CHUNK_SIZE, len(self.codes))
+            scores[:, start:stop] = self._score_chunk(queries, start, stop)
+        return scores
+
+    def _prepare(self, query_vectors):
+        return query_vectors
+
+    def _score_chunk(self, query_vectors, start, stop):
+        return query_vectors @ self.codes[start:stop].astype(np.float32).T
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes
+
+    def params(self):
+        return {}
+
+    def save(self, path):
+        np.save(Path(path) / CODES_FILE, self.codes)
+
+    @classmethod
+    def load(cls, path, params, mmap_mode="r"):
+        codec = cls(**params)
+        codec.codes = np.load(Path(path) / CODES_FILE, mmap_mode=mmap_mode)
+        return codec
+
+
+class Int8Codec(Float16Codec):
+    """Symmetric int8 scalar quantization with one float32 scale per vector."""
+
+    name = "int8"
+
+    def __init__(self):
+        super().__init__()
+        self.scales = None
+
+    def fit(self, vectors, seed=0):
+        self.codes = np.empty(vectors.shape, dtype=np.int8)
+        self.scales = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(vectors), SCORE_CHUNK_SIZE):
+            chunk = np.asarray(vectors[start : start + SCORE_CHUNK_SIZE], np.float32)
+            scales = np.abs(chunk).max(axis=1) / 127
+            scales[scales == 0] = 1
+            stop = start + len(chunk)
+            self.codes[start:stop] = np.rint(chunk / scales[:, None])
+            self.scales[start:stop] = scales
+        return self
+
+    def _score_chunk(self, query_vectors, start, stop):
+        scores = query_vectors @ self.codes[start:stop].astype(np.float32).T
+        return scores * self.scales[start:stop]
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.scales.nbytes
+
+    def save(self, path):
+        super().save(path)
+        np.save(Path(path) / SCALES_FILE, self.scales)
+
+    @classmethod
+    def load(cls, path, params, mmap_mode="r"):
+        codec = super().load(path, params, mmap_mode=mmap_mode)
+        codec.scales = np.load(Path(path) / SCALES_FILE)
+        return codec
+
+
+class PQCodec(Float16Codec):
+    """Product quantization: one byte per subspace, scored with lookup tables.
+
+    Each vector is split into n_subspaces slices and every slice is replaced
+    by the id of its nearest of 256 k-means centroids. A query is compared
+    against the centroids once (asymmetric distance computation), after
+    which each document costs n_subspaces table lookups.
+    """
+
+    name = "pq"
+
+    def __init__(self, n_subspaces=None):
+        super().__init__()
+        self.n_subspaces = n_subspaces
+        self.codebooks = None
+
+    def fit(self, vectors, seed=0):
+        n, dim = vectors.shape
+        if self.n_subspaces is None:
+            self.n_subspaces = max(1, dim // 4)
+        if dim % self.n_subspaces:
+            raise ValueError(
+                f"Embedding dim {dim} is not divisible by {self.n_subspaces} subspaces"
+            )
+
+        rng = np.random.default_rng(seed)
+        sample_size = min(n, PQ_TRAIN_SIZE)
+        sample = np.asarray(
+            vectors[np.sort(rng.choice(n, sample_size, replace=False))], np.float32
+        )
+        n_centroids = min(PQ_CENTROIDS, sample_size)
+        self.codebooks = np.stack(
+            [kmeans(subspace, n_centroids, 20, rng) for subspace in self._split(sample)]
+        )
+
+        self.codes = np.empty((n, self.n_subspaces), dtype=np.uint8)
+        for start in range(0, n, SCORE_CHUNK_SIZE):
+            chunk = np.asarray(vectors[start : start + SCORE_CHUNK_SIZE], np.float32)
+            for m, subspace in enumerate(self._split(chunk)):
+                # Nearest centroid by squared L2, up to the constant |x|^2.
+                self.codes[start : start + len(chunk), m] = np.argmin(
+                    (self.codebooks[m] ** 2).sum(axis=1)
+                    - 2 * subspace @ self.codebooks[m].T,
+                    axis=1,
+                )
+        return self
+
+    def _split(self, vectors):
+        return np.split(vectors, self.n_subspaces, axis=1)
+
+    def _prepare(self, query_vectors):
+        # (n_queries, n_subspaces, n_centroids) partial inner products.
+        return np.einsum(
+            "qmd,mkd->qmk",
+            query_vectors.reshape(len(query_vectors), self.n_subspaces, -1),
+            self.codebooks,
+        )
+
+    def _score_chunk(self, tables, start, stop):
+        codes = np.asarray(self.codes[start:stop])
+        subspaces = np.arange(self.n_subspaces)
+        return np.stack([table[subspaces, codes].sum(axis=1) for table in tables])
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.codebooks.nbytes
+
+    def params(self):
+        return {"n_subspaces": self.n_subspaces}
+
+    def save(self, path):
+        super().save(path)
+        np.save(Path(path) / CODEBOOKS_FILE, self.codebooks)
+
+    @classmethod
+    def load(cls, path, params, mmap_mode="r"):
+        codec = super().load(path, params, mmap_mode=mmap_mode)
+        codec.codebooks = np.load(Path(path) / CODEBOOKS_FILE)
+        return codec
+
+
+CODECS = {codec.name: codec for codec in (Float16Codec, Int8Codec, PQCodec)}
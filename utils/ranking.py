@@ -0,0 +1,60 @@
+import numpy as np
+
+RESULT_COLUMNS = [
+    "drink_title",
+    "drink_glass",
+    "garnish",
+    "comment",
+    "history",
+    "how_to_translated",
+]
+
+
+def top_n(relevance_scores, n, threshold=None):
+    """Indices and scores of the n best documents above threshold, best first.
+
+    Uses argpartition so only the winners are sorted: O(N + n log n) per query.
+    """
+    scores = np.asarray(relevance_scores)
+    if threshold is None:
+        candidates = None
+        n_candidates = len(scores)
+    else:
+        candidates = np.flatnonzero(scores > threshold)
+        n_candidates = len(candidates)
+
+    n = min(n, n_candidates)
+    if n <= 0:
+        return np.empty(0, dtype=np.intp), scores[:0]
+
+    candidate_scores = scores if candidates is None else scores[candidates]
+    if n < n_candidates:
+        winners = np.argpartition(-candidate_scores, n - 1)[:n]
+    else:
+        winners = np.arange(n_candidates)
+    winners = winners[np.argsort(-candidate_scores[winners], kind="stable")]
+
+    top_indices = winners if candidates is None else candidates[winners]
+    return top_indices, scores[top_indices]
+
+
+def merge_top_n(results, n, excluded=None):
+    """Best n of several (indices, scores) results, minus excluded indices."""
+    indices = np.concatenate([indices for indices, _ in results])
+    scores = np.concatenate([scores for _, scores in results])
+    if excluded is not None and len(excluded):
+        keep = ~np.isin(indices, excluded)
+        indices, scores = indices[keep], scores[keep]
+    winners, top_scores = top_n(scores, n)
+    return indices[winners], top_scores
+
+
+def to_records(df, top_indices, top_scores):
+    """Result rows of df for top_indices, each with its relevance score."""
+    if not len(top_indices):
+        return []
+
+    records = df[RESULT_COLUMNS].iloc[top_indices].fillna("").to_dict(orient="records")
+    for record, score in zip(records, top_scores):
+        record["relevance"] = float(score)
+    return records
@@ -0,0 +1,106 @@
+import json
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from utils.inverted_index import InvertedIndex
+
+VECTORIZER_FILE = "vectorizer.json"
+IDF_FILE = "idf.npy"
+MATRIX_FILES = ("data", "indices", "indptr")
+POSTINGS_FILES = ("offsets", "documents", "weights", "max_weights")
+
+SERIALIZABLE_PARAMS = (
+    "analyzer",
+    "binary",
+    "decode_error",
+    "encoding",
+    "input",
+    "lowercase",
+    "max_df",
+    "max_features",
+    "min_df",
+    "ngram_range",
+    "norm",
+    "smooth_idf",
+    "strip_accents",
+    "sublinear_tf",
+    "token_pattern",
+    "use_idf",
+)
+
+
+def save_tfidf(path, vectorizer: TfidfVectorizer, tfidf_matrix, inverted_index=None):
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    params = vectorizer.get_params()
+    if params["preprocessor"] is not None or params["tokenizer"] is not None:
+        raise ValueError("Vectorizers with custom callables cannot be stored as JSON")
+    if not isinstance(params["analyzer"], str):
+        raise ValueError(
+            "Vectorizers with a callable analyzer cannot be stored as JSON"
+        )
+
+    vocabulary = [None] * len(vectorizer.vocabulary_)
+    for term, i in vectorizer.vocabulary_.items():
+        vocabulary[i] = term
+    stop_words = params["stop_words"]
+    with open(path / VECTORIZER_FILE, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "params": {
+                    **{name: params[name] for name in SERIALIZABLE_PARAMS},
+                    "stop_words": (
+                        stop_words
+                        if stop_words is None or isinstance(stop_words, str)
+                        else list(stop_words)
+                    ),
+                    "dtype": np.dtype(params["dtype"]).name,
+                },
+                "shape": list(tfidf_matrix.shape),
+                "vocabulary": vocabulary,
+            },
+            f,
+        )
+    np.save(path / IDF_FILE, vectorizer.idf_)
+
+    tfidf_matrix = sparse.csr_matrix(tfidf_matrix)
+    for name in MATRIX_FILES:
+        np.save(path / f"{name}.npy", getattr(tfidf_matrix, name))
+
+    inverted_index = inverted_index or InvertedIndex.from_matrix(tfidf_matrix)
+    for name in POSTINGS_FILES:
+        np.save(path / f"postings_{name}.npy", getattr(inverted_index, name))
+
+
+def load_tfidf(path, mmap_mode="r"):
+    path = Path(path)
+    with open(path / VECTORIZER_FILE, "r", encoding="utf-8") as f:
+        state = json.load(f)
+
+    params = dict(state["params"])
+    params["ngram_range"] = tuple(params["ngram_range"])
+    params["dtype"] = np.dtype(params["dtype"]).type
+    vectorizer = TfidfVectorizer(**params)
+    vectorizer.vocabulary_ = {term: i for i, term in enumerate(state["vocabulary"])}
+    vectorizer.idf_ = np.load(path / IDF_FILE)
+
+    data, indices, indptr = (
+        np.load(path / f"{name}.npy", mmap_mode=mmap_mode) for name in MATRIX_FILES
+    )
+    tfidf_matrix = sparse.csr_matrix(
+        (data, indices, indptr), shape=tuple(state["shape"]), copy=False
+    )
+
+    offsets, documents, weights, max_weights = (
+        np.load(path / f"postings_{name}.npy", mmap_mode=mmap_mode)
+        for name in POSTINGS_FILES
+    )
+    inverted_index = InvertedIndex(
+        offsets, documents, weights, max_weights, tfidf_matrix.shape[0]
+    )
+
+    return vectorizer, tfidf_matrix, inverted_index
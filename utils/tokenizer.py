@@ -1,54 +1,231 @@
 from torch.utils.data import Dataset, DataLoader
 import torch.nn as nn
 import torch
+import json
 import re
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+
+import numpy as np
+
+TOKEN_EXPR = r"\b\w+\b"
+PARALLEL_MIN_TEXTS = 10000
+
+_worker_vocab = None
+
+
+_DEFAULT_PATTERN = re.compile(TOKEN_EXPR)
+_NON_WORD = re.compile(r"\W")
+_ASCII_NON_WORD = str.maketrans(
+    {c: " " for c in range(128) if not re.match(r"\w", chr(c))}
+)
+# Initial prefix budget per requested token; doubled until enough are found.
+_CHARS_PER_TOKEN = 8
+
+
+def _scan_default(text: str, n: int) -> list:
+    # Only scan a prefix that ends on a non-word character, so no token is
+    # cut in half, and split ASCII text with str.translate instead of re.
+    end = n * _CHARS_PER_TOKEN
+    while end < len(text):
+        cut = _NON_WORD.search(text, end)
+        if cut is None:
+            break
+        words = _split_words(text[: cut.start()])
+        if len(words) >= n:
+            return words[:n]
+        end *= 2
+    return _split_words(text)[:n]
+
+
+def _split_words(text: str) -> list:
+    if text.isascii():
+        return text.translate(_ASCII_NON_WORD).split()
+    return _DEFAULT_PATTERN.findall(text)
+
+
+@lru_cache(maxsize=None)
+def _scanner(expr: str):
+    if expr == TOKEN_EXPR:
+        return _scan_default
+    pattern = re.compile(expr)
+    # finditer is lazy, so scanning stops once n tokens are found
+    return lambda text, n: [
+        match.group() for match in islice(pattern.finditer(text), n)
+    ]
+
+
+def _find_all(expr: str):
+    if expr == TOKEN_EXPR:
+        return _split_words
+    return re.compile(expr).findall
+
+
+def build_vocabulary(
+    documents,
+    expr: str = TOKEN_EXPR,
+    case_sensitive: bool = False,
+    min_freq: int = 1,
+    max_size: int = None,
+):
+    """Stream documents once, counting tokens; ids go by frequency, then token.
+
+    max_size caps the number of regular tokens, <PAD> and <UNK> excluded.
+    """
+    find_all = _find_all(expr)
+    counts = Counter()
+    for document in documents:
+        if case_sensitive == False:
+            document = document.lower()
+        counts.update(find_all(document))
+
+    tokens = sorted(
+        (token for token, count in counts.items() if count >= min_freq),
+        key=lambda token: (-counts[token], token),
+    )[:max_size]
+    inverse_vocab = ["<PAD>", "<UNK>"] + tokens
+    vocab = {token: i for i, token in enumerate(inverse_vocab)}
+    return vocab, inverse_vocab
 
 
 def get_vocabulary(
     text: str,
-    expr: str = r"\b\w+\b",
+    expr: str = TOKEN_EXPR,
     case_sensitive: bool = False,
 ) -> dict:
+    return build_vocabulary([text], expr=expr, case_sensitive=case_sensitive)
+
+
+def _encode_into(row, text, vocab, scan, sentence_length, case_sensitive, unk_id):
     if case_sensitive == False:
         text = text.lower()
-    vocabulary = set(re.findall(expr, text))
-    vocab = dict()
-    inverse_vocab = list()
-    vocab["<PAD>"] = 0
-    inverse_vocab.append("<PAD>")
-    vocab["<UNK>"] = 1
-    inverse_vocab.append("<UNK>")
-    for i, token in enumerate(vocabulary):
-        if token not in vocab:
-            vocab[token] = i + 2
-            inverse_vocab.append(token)
-    return vocab, inverse_vocab
+    ids = [vocab.get(word, unk_id) for word in scan(text, sentence_length)]
+    if ids:
+        row[sentence_length - len(ids) :] = ids
 
 
 def tokenize_words(
     text: str,
     vocab: dict,
-    expr: str = r"\b\w+\b",
+    expr: str = TOKEN_EXPR,
     sentence_length: int = 10,
     case_sensitive: bool = False,
 ) -> list:
-    if case_sensitive == False:
-        text = text.lower()
-    words = re.findall(expr, text)
-    tokens = []
-    for i, w in enumerate(words):
-        if i == sentence_length:
-            break
-        if w in vocab:
-            tokens.append(vocab[w])
-        else:
-            tokens.append(vocab["<UNK>"])
+    row = np.full(sentence_length, vocab["<PAD>"], dtype=np.int32)
+    _encode_into(
+        row,
+        text,
+        vocab,
+        _scanner(expr),
+        sentence_length,
+        case_sensitive,
+        vocab["<UNK>"],
+    )
+    return row.tolist()
+
+
+def _encode_chunk(texts, vocab, expr, sentence_length, case_sensitive):
+    scan = _scanner(expr)
+    unk_id = vocab["<UNK>"]
+    token_ids = np.full((len(texts), sentence_length), vocab["<PAD>"], dtype=np.int32)
+    for row, text in zip(token_ids, texts):
+        _encode_into(row, text, vocab, scan, sentence_length, case_sensitive, unk_id)
+    return token_ids
+
+
+def _init_worker(vocab):
+    global _worker_vocab
+    _worker_vocab = vocab
+
+
+def _encode_chunk_in_worker(texts, expr, sentence_length, case_sensitive):
+    return _encode_chunk(texts, _worker_vocab, expr, sentence_length, case_sensitive)
+
+
+def encode_chunks(
+    texts,
+    vocab: dict,
+    expr: str = TOKEN_EXPR,
+    sentence_length: int = 10,
+    case_sensitive: bool = False,
+    n_jobs: int = 1,
+    chunk_size: int = 2048,
+):
+    """Yield left-padded int32 id arrays for consecutive chunks of texts, in order.
 
-    if len(tokens) < sentence_length:
-        n_pad = sentence_length - len(tokens)
-        pad = [vocab["<PAD>"]] * n_pad
-        tokens = pad + tokens
-    return tokens
+    With n_jobs > 1 and at least PARALLEL_MIN_TEXTS texts, chunks are encoded
+    in a process pool that receives the vocabulary once per worker; at most
+    2 * n_jobs chunks are in flight.
+    """
+    chunks = (texts[i : i + chunk_size] for i in range(0, len(texts), chunk_size))
+    if n_jobs == 1 or len(texts) < PARALLEL_MIN_TEXTS:
+        for chunk in chunks:
+            yield _encode_chunk(chunk, vocab, expr, sentence_length, case_sensitive)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=n_jobs, initializer=_init_worker, initargs=(vocab,)
+    ) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(
+                pool.submit(
+                    _encode_chunk_in_worker,
+                    list(chunk),
+                    expr,
+                    sentence_length,
+                    case_sensitive,
+                )
+            )
+            if len(pending) >= 2 * n_jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def encode_batch(
+    texts,
+    vocab: dict,
+    expr: str = TOKEN_EXPR,
+    sentence_length: int = 10,
+    case_sensitive: bool = False,
+    n_jobs: int = 1,
+    chunk_size: int = 2048,
+) -> np.ndarray:
+    """Left-padded int32 token ids, one row per text."""
+    texts = list(texts)
+    if n_jobs == 1 or len(texts) < PARALLEL_MIN_TEXTS:
+        return _encode_chunk(texts, vocab, expr, sentence_length, case_sensitive)
+
+    return np.concatenate(
+        list(
+            encode_chunks(
+                texts, vocab, expr, sentence_length, case_sensitive, n_jobs, chunk_size
+            )
+        )
+    )
+
+
+def encode_ragged(
+    texts,
+    vocab: dict,
+    expr: str = TOKEN_EXPR,
+    sentence_length: int = 10,
+    case_sensitive: bool = False,
+):
+    """Unpadded token ids: a flat int32 array plus the number of ids per text."""
+    scan = _scanner(expr)
+    unk_id = vocab["<UNK>"]
+    ids, lengths = [], []
+    for text in texts:
+        if case_sensitive == False:
+            text = text.lower()
+        words = scan(text, sentence_length)
+        ids.extend(vocab.get(word, unk_id) for word in words)
+        lengths.append(len(words))
+    return np.array(ids, dtype=np.int32), np.array(lengths, dtype=np.int64)
 
 
 def detokenize_words(tokens: list, invert_vocab: list) -> str:
@@ -61,12 +238,39 @@ class MyTokenizer:
         self.sentence_length = sentence_length
         self.case_sensitive = case_sensitive
 
-    def fit(self, phrases: list, expr: str = r"\b\w+\b"):
-        self.vocab, self.inverse_vocab = get_vocabulary(
-            " ".join(phrases), expr=expr, case_sensitive=self.case_sensitive
+    def fit(
+        self, phrases: list, expr: str = TOKEN_EXPR, min_freq: int = 1, max_size=None
+    ):
+        self.vocab, self.inverse_vocab = build_vocabulary(
+            phrases,
+            expr=expr,
+            case_sensitive=self.case_sensitive,
+            min_freq=min_freq,
+            max_size=max_size,
         )
         self.vocab_size = len(self.vocab)
 
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "sentence_length": self.sentence_length,
+                    "case_sensitive": self.case_sensitive,
+                    "inverse_vocab": self.inverse_vocab,
+                },
+                f,
+            )
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        tokenizer = cls(state["sentence_length"], state["case_sensitive"])
+        tokenizer.inverse_vocab = state["inverse_vocab"]
+        tokenizer.vocab = {token: i for i, token in enumerate(tokenizer.inverse_vocab)}
+        tokenizer.vocab_size = len(tokenizer.vocab)
+        return tokenizer
+
     def __call__(self, x):
         return tokenize_words(
             x,
@@ -75,17 +279,45 @@ class MyTokenizer:
             case_sensitive=self.case_sensitive,
         )
 
+    def encode_batch(self, phrases, n_jobs=1):
+        return encode_batch(
+            phrases,
+            self.vocab,
+            sentence_length=self.sentence_length,
+            case_sensitive=self.case_sensitive,
+            n_jobs=n_jobs,
+        )
+
+    def encode_chunks(self, phrases, chunk_size=2048, n_jobs=1):
+        return encode_chunks(
+            phrases,
+            self.vocab,
+            sentence_length=self.sentence_length,
+            case_sensitive=self.case_sensitive,
+            n_jobs=n_jobs,
+            chunk_size=chunk_size,
+        )
+
+    def encode_ragged(self, phrases):
+        return encode_ragged(
+            phrases,
+            self.vocab,
+            sentence_length=self.sentence_length,
+            case_sensitive=self.case_sensitive,
+        )
+
 
 class TextDataset(Dataset):
-    def __init__(self, df, vocab, max_len):
+    def __init__(self, df, vocab, max_len, n_jobs=1):
         self.texts = df["whole_text"]
         self.vocab = vocab
         self.max_len = max_len
+        self.token_ids = torch.from_numpy(
+            encode_batch(self.texts, vocab, sentence_length=max_len, n_jobs=n_jobs)
+        ).long()
 
     def __len__(self):
         return len(self.texts)
 
     def __getitem__(self, idx):
-        text = self.texts[idx]
-        tokenized_text = tokenize_words(text, self.vocab, self.max_len)
-        return torch.tensor(tokenized_text, dtype=torch.long)
+        return self.token_ids[idx]
@@ -1,30 +1,157 @@
+import argparse
+import copy
+import hashlib
+import logging
+import os
+import time
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
 import torch
 import torch.nn as nn
+from logs.logger import Logger
+from torch.utils.data import DataLoader, TensorDataset, random_split
+from utils.artifacts import ArtifactBundle
 from utils.autoencoder import Autoencoder
 from utils.glove import Glove
+from utils.pooling import masked_mean_pool
 from utils.tokenizer import MyTokenizer
 
+logger = logging.getLogger(__name__)
 
-def train_autoencoder(model, data, criterion, optimizer, epochs=20, batch_size=256):
-    model.train()  
-    for epoch in range(epochs):
-        total_loss = 0
-        for i in range(0, len(data), batch_size):
-            batch = data[i:i+batch_size]
-            batch = torch.FloatTensor(batch) 
 
-            outputs = model(batch)
+def _evaluate(model, loader, criterion):
+    model.eval()
+    total_loss = 0.0
+    with torch.no_grad():
+        for (batch,) in loader:
+            total_loss += criterion(model(batch), batch).item() * len(batch)
+    return total_loss / len(loader.dataset)
+
+
+def _fingerprint(model, data, batch_size, val_fraction, seed):
+    # Everything a resumed run must share with the one that wrote the
+    # checkpoint; epochs and patience may change, to train further.
+    digest = hashlib.sha256(np.ascontiguousarray(data).tobytes())
+    for name, tensor in model.state_dict().items():
+        digest.update(f"{name}{tuple(tensor.shape)}".encode())
+    digest.update(f"{data.shape}{batch_size}{val_fraction}{seed}".encode())
+    return digest.hexdigest()
+
+
+def _save_checkpoint(checkpoint_path, state):
+    tmp_path = f"{checkpoint_path}.tmp"
+    torch.save(state, tmp_path)
+    os.replace(tmp_path, checkpoint_path)
 
+
+def train_autoencoder(
+    model,
+    data,
+    criterion,
+    optimizer,
+    epochs=20,
+    batch_size=256,
+    val_fraction=0.1,
+    patience=3,
+    min_delta=0.0,
+    num_workers=0,
+    checkpoint_path=None,
+    resume=False,
+    seed=0,
+):
+    """Train model on data, checkpointing every epoch to checkpoint_path if given.
+
+    With resume, training continues from that checkpoint; it must have been
+    written for the same data, architecture, batch size, split and seed.
+    Otherwise an existing checkpoint is overwritten.
+    """
+    data = np.asarray(data, dtype=np.float32)
+    fingerprint = _fingerprint(model, data, batch_size, val_fraction, seed)
+    # One contiguous float32 tensor up front instead of a conversion per batch.
+    dataset = TensorDataset(torch.as_tensor(data))
+    n_val = int(len(dataset) * val_fraction) if len(dataset) > 1 else 0
+    generator = torch.Generator().manual_seed(seed)
+    train_set, val_set = random_split(
+        dataset, [len(dataset) - n_val, n_val], generator=generator
+    )
+    train_loader = DataLoader(
+        train_set,
+        batch_size=batch_size,
+        shuffle=True,
+        num_workers=num_workers,
+        generator=generator,
+    )
+    val_loader = DataLoader(val_set, batch_size=batch_size) if n_val else None
+
+    start_epoch, best_loss, best_state, stale_epochs = 0, float("inf"), None, 0
+    if resume:
+        if not checkpoint_path or not Path(checkpoint_path).exists():
+            raise FileNotFoundError(
+                f"No checkpoint to resume from at {checkpoint_path}"
+            )
+        checkpoint = torch.load(checkpoint_path, weights_only=True)
+        if checkpoint.get("fingerprint") != fingerprint:
+            raise ValueError(
+                f"{checkpoint_path} was written for other data or "
+                "hyperparameters; train without resuming to overwrite it"
+            )
+        model.load_state_dict(checkpoint["model"])
+        optimizer.load_state_dict(checkpoint["optimizer"])
+        start_epoch = checkpoint["epoch"] + 1
+        best_loss = checkpoint["best_loss"]
+        best_state = checkpoint["best_model"]
+        stale_epochs = checkpoint["stale_epochs"]
+        logger.info(f"Resuming training from {checkpoint_path} at epoch {start_epoch + 1}")
+
+    for epoch in range(start_epoch, epochs):
+        if stale_epochs >= patience:
+            break
+        started = time.perf_counter()
+        model.train()
+        train_loss = 0.0
+        for (batch,) in train_loader:
+            outputs = model(batch)
             loss = criterion(outputs, batch)
-            
+
             optimizer.zero_grad()
             loss.backward()
             optimizer.step()
 
-            total_loss += loss.item()
+            train_loss += loss.item() * len(batch)
+        train_loss /= len(train_set)
+        val_loss = _evaluate(model, val_loader, criterion) if val_loader else train_loss
 
+        if val_loss < best_loss - min_delta:
+            best_loss = val_loss
+            best_state = copy.deepcopy(model.state_dict())
+            stale_epochs = 0
+        else:
+            stale_epochs += 1
+        logger.info(
+            f"Epoch {epoch + 1}/{epochs}: train_loss={train_loss:.6f} "
+            f"val_loss={val_loss:.6f} time={time.perf_counter() - started:.2f}s"
+        )
+
+        if checkpoint_path:
+            _save_checkpoint(
+                checkpoint_path,
+                {
+                    "epoch": epoch,
+                    "model": model.state_dict(),
+                    "optimizer": optimizer.state_dict(),
+                    "best_loss": best_loss,
+                    "best_model": best_state,
+                    "stale_epochs": stale_epochs,
+                    "fingerprint": fingerprint,
+                },
+            )
+        if stale_epochs >= patience:
+            logger.info(f"Early stopping: no improvement for {patience} epochs")
+
+    if best_state is not None:
+        model.load_state_dict(best_state)
     return model
 
 def create_embedding_matrix(vocab, glove_vectors, embedding_dim=300):
@@ -46,23 +173,75 @@ def mean_pooling(vectors):
     return np.mean(vectors, axis=0)
 
 
-def get_enhanced_embeddings(model, data):
-    model.eval() 
-    enhanced_embeddings = []
+def _allocate(out, shape):
+    if out is None:
+        return np.empty(shape, dtype=np.float32)
+    if isinstance(out, (str, Path)):
+        return np.lib.format.open_memmap(out, mode="w+", dtype=np.float32, shape=shape)
+    return out
+
+
+def _encode(model, pooled):
     with torch.no_grad():
-        for sentence_embedding in data:
-            sentence_embedding = torch.FloatTensor(sentence_embedding).unsqueeze(0)
-            encoded_embedding = model.encoder(sentence_embedding)
-            enhanced_embeddings.append(encoded_embedding.squeeze(0).numpy())
+        return model.encoder(torch.from_numpy(np.ascontiguousarray(pooled))).numpy()
+
+
+def get_enhanced_embeddings(model, data, batch_size=4096, out=None):
+    model.eval()
+    data = np.asarray(data, dtype=np.float32)
+    output_dim = model.encoder[-2].out_features
+    enhanced_embeddings = _allocate(out, (len(data), output_dim))
+    for start in range(0, len(data), batch_size):
+        batch = data[start : start + batch_size]
+        enhanced_embeddings[start : start + len(batch)] = _encode(model, batch)
     return enhanced_embeddings
 
+
+def embed_corpus(
+    texts, tokenizer, embedding_matrix, model=None, chunk_size=4096, n_jobs=1, out=None
+):
+    """Pool (and, given a model, encode) texts chunk by chunk into one array.
+
+    Only one chunk of token ids and pooled vectors is alive at a time, so
+    memory stays fixed however large the corpus is; out may be a .npy path
+    to write the result straight into a memory-mapped file.
+    """
+    texts = list(texts)
+    dim = embedding_matrix.shape[1] if model is None else model.encoder[-2].out_features
+    embeddings = _allocate(out, (len(texts), dim))
+    if model is not None:
+        model.eval()
+
+    start = 0
+    pad_id = tokenizer.vocab["<PAD>"]
+    for token_ids in tokenizer.encode_chunks(texts, chunk_size, n_jobs):
+        pooled = masked_mean_pool(token_ids, embedding_matrix, pad_id=pad_id)
+        if model is not None:
+            pooled = _encode(model, pooled)
+        embeddings[start : start + len(pooled)] = pooled
+        start += len(pooled)
+    return embeddings
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Train the autoencoder and save the artifact bundle"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue an interrupted run from its checkpoint",
+    )
+    args = parser.parse_args()
+
+    Logger.setup_log(log_level=logging.INFO, local_dir="./logs")
+
     input_dim = 300  
     hidden_fst = 200
     hidden_snd = 100
 
     documents = pd.read_csv('data/example/cocktail_data_silver.csv')
-    glove = Glove._load_glove_vectors("model/glove.6B/glove.6B.300d.txt")
+    glove = Glove.load_vectors("model/glove.6B/glove.6B.300d")
 
 
     autoencoder = Autoencoder(input_dim, hidden_fst, hidden_snd)
@@ -73,20 +252,23 @@ if __name__ == "__main__":
     tokenizer = MyTokenizer(sentence_length=450, case_sensitive=False)
     tokenizer.fit(documents.whole_text)
 
-    embedding_matrix = create_embedding_matrix(tokenizer.vocab, glove)
+    embedding_matrix = create_embedding_matrix(tokenizer.vocab, glove).astype(np.float32)
 
-    sentence_embeddings = []
-    for phrase in documents.whole_text:
-        tokens = tokenizer(phrase)  
-        vectors = [embedding_matrix[token] for token in tokens]  
-        pooled_embedding = mean_pooling(vectors)  
-        sentence_embeddings.append(pooled_embedding)
+    sentence_embeddings = embed_corpus(
+        documents.whole_text, tokenizer, embedding_matrix, n_jobs=os.cpu_count()
+    )
 
-    data_sentence_embeddings = sentence_embeddings.copy()
-    model = train_autoencoder(autoencoder, data_sentence_embeddings, criterion, optimizer)
+    model = train_autoencoder(
+        autoencoder,
+        sentence_embeddings,
+        criterion,
+        optimizer,
+        checkpoint_path="model/example/autoencoder_checkpoint.pt",
+        resume=args.resume,
+    )
 
-    enhanced_embeddings = get_enhanced_embeddings(model, data_sentence_embeddings)
+    enhanced_embeddings = get_enhanced_embeddings(model, sentence_embeddings)
 
-    torch.save(model.state_dict(), "model/example/autoencoder_model.pth")
-    with open('model/example/glove_trained_embeddings.npy', 'wb') as f:
-        np.save(f, np.array(enhanced_embeddings))
+    ArtifactBundle(
+        tokenizer, embedding_matrix, model, enhanced_embeddings
+    ).save("model/example")